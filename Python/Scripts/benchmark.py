@@ -0,0 +1,503 @@
+"""Benchmarks for the screen reading code.
+
+These run offline against recorded screenshots, so they work without a game
+window and on any OS. Save a screenshot of the game with get_bitmap().save()
+and pass it to the benchmark, otherwise a synthetic frame is used.
+
+Usage:
+
+python benchmark.py pixel_search [screenshot.png ...]
+python benchmark.py capture [screenshot.png ...]
+python benchmark.py region [screenshot.png ...]
+python benchmark.py templates [screenshot.png ...]
+python benchmark.py grabber [screenshot.png ...]
+python benchmark.py ocr crop.png [crop.png ...]
+python benchmark.py digits training_corpus [test_corpus]
+python benchmark.py ocr_pool crop.png [crop.png ...]
+python benchmark.py record screenshot.png [screenshot.png ...]
+python benchmark.py corpus corpus [--json results.json]
+                                  [--baseline results.json]
+"""
+from classes.capture import FakeCapture, Frame
+from classes.corpus import Corpus
+from classes.digits import Digits
+from classes.grabber import Grabber
+from classes.ocrengine import OcrEngine, PytesseractEngine, TesserocrEngine
+from classes.ocrpool import OcrPool
+from classes.ocrprofile import OcrProfile
+from classes.pixelsearch import PixelSearch
+from classes.templates import Templates
+from PIL import Image as image
+import argparse
+import cv2
+import json
+import ngucon as ncon
+import numpy
+import os
+import tempfile
+import time
+
+
+def measure(function, repeat=5):
+    """Run function repeat times, return the last result and best time."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def synthetic_frame(width=976, height=616):
+    """Return a noisy frame with TOP_LEFT_COLOR near the end of the area."""
+    rng = numpy.random.default_rng(0)
+    frame = rng.integers(0, 256, (height, width, 3), dtype=numpy.uint8)
+    color = PixelSearch.to_int(ncon.TOP_LEFT_COLOR)
+    frame[590, 390] = (color >> 16 & 0xff, color >> 8 & 0xff, color & 0xff)
+    return image.fromarray(frame)
+
+
+def load_frames(paths):
+    """Load the supplied screenshots, or a synthetic frame."""
+    if not paths:
+        return [("synthetic", synthetic_frame())]
+    return [(path, image.open(path).convert("RGB")) for path in paths]
+
+
+def rgb_to_hex(tup):
+    """Convert RGB value to HEX."""
+    return '%02x%02x%02x'.upper() % (tup[0], tup[1], tup[2])
+
+
+def legacy_pixel_search(bmp, color, x_start, y_start, x_end, y_end):
+    """Pixel search as it was done before PixelSearch."""
+    for y in range(y_start, y_end):
+        for x in range(x_start, x_end):
+            t = bmp.getpixel((x, y))
+            if (rgb_to_hex(t) == color):
+                return x - 8, y - 8
+    return None
+
+
+def pixel_search(paths):
+    """Compare the legacy and vectorized startup search for TOP_LEFT_COLOR."""
+    for name, bmp in load_frames(paths):
+        x_end, y_end = min(400, bmp.width), min(600, bmp.height)
+        old, old_time = measure(lambda: legacy_pixel_search(
+            bmp, ncon.TOP_LEFT_COLOR, 0, 0, x_end, y_end), repeat=1)
+
+        def vectorized():
+            area = numpy.asarray(bmp)[0:y_end, 0:x_end]
+            match = PixelSearch.first(area, ncon.TOP_LEFT_COLOR)
+            if match is None:
+                return None
+            return match[0] - 8, match[1] - 8
+        new, new_time = measure(vectorized)
+        if old != new:
+            raise RuntimeError(f"{name}: results differ, {old} != {new}")
+        print(f"{name}: found {new}, legacy {old_time * 1000:.1f} ms, "
+              f"numpy {new_time * 1000:.2f} ms "
+              f"({old_time / new_time:.0f}x)")
+
+
+def capture(paths, grabs=200):
+    """Compare a capture that allocates per call with a persistent one.
+
+    The per call capture converts every frame to a Pillow image, like the old
+    get_bitmap() did, while the persistent one hands out NumPy views.
+    """
+    frames = [bmp for _, bmp in load_frames(paths)]
+    for persistent in (False, True):
+        backend = FakeCapture(frames, persistent)
+
+        def run():
+            for _ in range(grabs):
+                frame = backend.grab()
+                if not persistent:
+                    frame.image()
+                frame.pixel(0, 0)
+        _, elapsed = measure(run, repeat=1)
+        name = "persistent" if persistent else "per call"
+        print(f"{name:>10}: {backend.allocations} allocations for "
+              f"{backend.grabs} grabs, {elapsed / grabs * 1000:.3f} ms/grab")
+
+
+def region(paths, grabs=200):
+    """Compare cropping a full frame with capturing only the boss number.
+
+    Screenshots are assumed to have the game in the top left corner of the
+    window, inside the 8px border.
+    """
+    frames = [bmp for _, bmp in load_frames(paths)]
+    box = (ncon.OCRBOSSX1 + 8, ncon.OCRBOSSY1 + 8,
+           ncon.OCRBOSSX2 + 8, ncon.OCRBOSSY2 + 8)
+    backend = FakeCapture(frames)
+
+    def full():
+        for _ in range(grabs):
+            backend.grab().image().crop(box)
+
+    def roi():
+        for _ in range(grabs):
+            image.fromarray(numpy.ascontiguousarray(
+                backend.grab_region(*box)))
+    _, full_time = measure(full, repeat=1)
+    _, roi_time = measure(roi, repeat=1)
+    width, height = backend.size()
+    full_bytes = width * height * 4
+    roi_bytes = (box[2] - box[0]) * (box[3] - box[1]) * 4
+    print(f"full frame: {full_bytes} bytes, {full_time / grabs * 1000:.3f} "
+          f"ms/read\n    region: {roi_bytes} bytes, "
+          f"{roi_time / grabs * 1000:.3f} ms/read")
+
+
+def text_frame(width=976, height=616):
+    """Return a frame of numbers on a gradient, like the game's menus.
+
+    Unlike the noise of synthetic_frame(), its downscaled copies look alike
+    in many places, which is where coarse to fine matching can go wrong.
+    """
+    rng = numpy.random.default_rng(0)
+    gray = numpy.tile(numpy.linspace(40, 200, width, dtype=numpy.uint8),
+                      (height, 1))
+    for _ in range(120):
+        cv2.putText(gray, str(rng.integers(0, 10 ** 7)),
+                    (int(rng.integers(0, width - 100)),
+                     int(rng.integers(20, height))),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, 255, 1)
+    return image.fromarray(cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB))
+
+
+def templates(paths, count=40):
+    """Compare a full size search with the cached pyramid matching.
+
+    Pieces of each frame that aren't flat are saved as templates, and both
+    searches look for them in the whole frame. A different location only
+    counts as a miss if it scores lower than the full size match.
+    """
+    frames = load_frames(paths)
+    if not paths:
+        frames.append(("text", text_frame()))
+    rng = numpy.random.default_rng(0)
+    folder = tempfile.mkdtemp()
+    for name, bmp in frames:
+        area = cv2.cvtColor(numpy.asarray(bmp), cv2.COLOR_RGB2GRAY)
+        misses = searched = 0
+        old_total = new_total = 0
+        fallbacks = Templates.fallbacks
+        while searched < count:
+            x = int(rng.integers(0, area.shape[1] - 48))
+            y = int(rng.integers(0, area.shape[0] - 24))
+            template = area[y:y + 24, x:x + 48]
+            if template.std() < 30:  # Flat pieces match in many places
+                continue
+            searched += 1
+            path = os.path.join(folder, "template.png")
+            cv2.imwrite(path, template)
+
+            def legacy():
+                res = cv2.matchTemplate(area, cv2.imread(path, 0),
+                                        cv2.TM_CCOEFF_NORMED)
+                _, score, _, location = cv2.minMaxLoc(res)
+                return location, score
+            (old, score), old_time = measure(legacy)
+            new, new_time = measure(lambda: Templates.match(area, path))
+            os.remove(path)
+            old_total += old_time
+            new_total += new_time
+            if new[:2] != old and new[2] < score - 0.001:
+                misses += 1
+                print(f"{name}: template at {x}, {y} found at {new[:2]} "
+                      f"({new[2]:.3f}), full size search {old} "
+                      f"({score:.3f})")
+        print(f"{name}: {misses}/{count} misses, "
+              f"{Templates.fallbacks - fallbacks} full size fallbacks, "
+              f"full size {old_total * 1000:.1f} ms, pyramid "
+              f"{new_total * 1000:.1f} ms ({old_total / new_total:.1f}x)")
+
+
+def grabber(paths, rate=60, duration=2):
+    """Measure the capture jitter and read latency of the grabber."""
+    frames = [bmp for _, bmp in load_frames(paths)]
+    thread = Grabber(FakeCapture(frames), rate)
+    thread.start()
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        thread.latest()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.001)
+    thread.stop()
+    mean, std, worst = thread.jitter()
+    print(f"{thread.seq} frames at {rate} fps: interval {mean * 1000:.2f} ms "
+          f"+- {std * 1000:.2f} ms, worst {worst * 1000:.2f} ms\n"
+          f"latest(): {max(latencies) * 1e6:.1f} us worst of "
+          f"{len(latencies)} reads")
+
+
+def ocr(paths, repeat=5):
+    """Compare the latency of the OCR engines on saved crops.
+
+    Crops are regions cut from a screenshot, like the ones ocr() reads. They
+    are prepared the same way before being passed to the engines. Each
+    engine also reads all crops stitched together, like ocr_many() does.
+    """
+    if not paths:
+        raise SystemExit("Pass one or more saved crops to benchmark")
+    crops = [(path, OcrEngine.prepare(numpy.asarray(
+        image.open(path).convert("RGB")))) for path in paths]
+    engines = [PytesseractEngine()]
+    if isinstance(OcrEngine.default(), TesserocrEngine):
+        engines.append(TesserocrEngine())
+    results = {}
+    for engine in engines:
+        name = type(engine).__name__
+        engine.read(crops[0][1])  # Warm up, persistent engines load here
+        times = []
+        for path, bmp in crops:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                text = engine.read(bmp)
+                times.append(time.perf_counter() - start)
+            results.setdefault(path, {})[name] = text.strip()
+        print(f"{name:>18}: median {numpy.median(times) * 1000:.1f} ms, "
+              f"worst {max(times) * 1000:.1f} ms")
+        bmps = [bmp for _, bmp in crops]
+        texts, best = measure(lambda: engine.read_many(bmps), repeat)
+        print(f"{'stitched':>18}: {best * 1000:.1f} ms for all "
+              f"{len(bmps)} crops, {sum(times) / repeat * 1000:.1f} ms "
+              f"one by one")
+        for (path, _), text in zip(crops, texts):
+            if text.strip() != results[path][name]:
+                print(f"{path}: stitched read {text.strip()!r}, "
+                      f"alone {results[path][name]!r}")
+        engine.close()
+    for path, texts in results.items():
+        if len(set(texts.values())) > 1:
+            print(f"{path}: engines disagree {texts}")
+
+
+def digits(paths):
+    """Train the glyph recognizer on a corpus and measure it.
+
+    The atlas learned from the first corpus is saved to Digits.ATLAS, where
+    ocr_number() picks it up. Accuracy and speed are measured on the second
+    corpus, or on the training corpus if only one is passed.
+    """
+    if not paths:
+        raise SystemExit("Pass a corpus folder to train on")
+    reader = Digits(os.path.join(tempfile.mkdtemp(), Digits.ATLAS))
+    skipped = [name for _, name, area, label in Corpus(paths[0]).samples()
+               if not reader.learn(area, label)]
+    if skipped:
+        print(f"{len(skipped)} crops didn't split into one glyph per "
+              f"character and were skipped")
+    reader.path = Digits.ATLAS
+    reader.save()
+
+    total = correct = confident = 0
+    times = []
+    for region, name, area, label in Corpus(paths[-1]).samples():
+        start = time.perf_counter()
+        text, confidence = reader.read(area)
+        times.append(time.perf_counter() - start)
+        total += 1
+        if confidence >= Digits.THRESHOLD:
+            confident += 1
+            correct += text == label.replace(" ", "")
+            if text != label.replace(" ", ""):
+                print(f"{region}/{name}: read {text!r}, expected {label!r}")
+    if not total:
+        raise SystemExit("The test corpus is empty")
+    print(f"{confident}/{total} confident reads, {correct} of them correct, "
+          f"median {numpy.median(times) * 1000:.3f} ms per field")
+
+
+def ocr_pool(paths, repeat=5):
+    """Compare reading crops one by one with reading them in the pool."""
+    if not paths:
+        raise SystemExit("Pass one or more saved crops to benchmark")
+    frames = []
+    for path in paths:
+        rgba = numpy.asarray(image.open(path).convert("RGBA"))
+        frames.append(Frame(numpy.ascontiguousarray(rgba[..., [2, 1, 0, 3]]),
+                            time.perf_counter()))
+    engine = OcrEngine.default()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            engine.read(OcrEngine.prepare(frame.rgb.copy()))
+    serial = time.perf_counter() - start
+    engine.close()
+
+    pool = OcrPool()
+    first = frames[0]
+    # Warm up, the workers start here
+    pool.read(first, (0, 0, first.width, first.height)).result()
+    start = time.perf_counter()
+    futures = [pool.read(frame, (0, 0, frame.width, frame.height))
+               for _ in range(repeat) for frame in frames]
+    submitted = time.perf_counter() - start
+    for future in futures:
+        future.result()
+    parallel = time.perf_counter() - start
+    stats = pool.stats()
+    pool.close()
+    print(f"{len(futures)} reads: {serial * 1000:.1f} ms one by one, "
+          f"{parallel * 1000:.1f} ms in {pool.workers} workers, the caller "
+          f"was blocked for {submitted * 1000:.1f} ms\n"
+          f"latency median {stats['latency_median']:.1f} ms, worst "
+          f"{stats['latency_worst']:.1f} ms, utilization "
+          f"{stats['utilization']:.0%}")
+
+
+def ocr_readers():
+    """Return name: function(area, profile) of every installed OCR reader.
+
+    The glyph recognizer is included if an atlas was trained, it ignores
+    the profile.
+    """
+    readers = {}
+    engines = [PytesseractEngine()]
+    if isinstance(OcrEngine.default(), TesserocrEngine):
+        engines.append(TesserocrEngine())
+    for engine in engines:
+        readers[type(engine).__name__] = (
+            lambda area, profile, engine=engine:
+            engine.read(profile.prepare(area), profile.config))
+    if os.path.exists(Digits.ATLAS):
+        glyphs = Digits()
+
+        def read_digits(area, profile):
+            text, confidence = glyphs.read(area)
+            return text if confidence >= Digits.THRESHOLD else ""
+        readers["Digits"] = read_digits
+    return readers
+
+
+def corpus(paths, output=None, baseline=None):
+    """Measure accuracy and speed of every OCR reader and profile.
+
+    Every crop of the corpus is read with every combination, and the exact
+    match accuracy, latency percentiles and throughput are reported per
+    region. The profile a region uses in ncon.OCR_REGIONS is marked with a
+    *. Results can be saved as JSON with --json, and compared to an earlier
+    run with --baseline to catch regressions.
+    """
+    if not paths:
+        raise SystemExit("Pass a corpus folder to benchmark")
+    data = Corpus(paths[0])
+    readers = ocr_readers()
+    results = []
+    for region in data.regions():
+        samples = list(data.samples(region))
+        if not samples:
+            continue
+        assigned = ncon.OCR_REGIONS.get(region, [None])[-1] or "default"
+        print(f"{region} ({len(samples)} crops)")
+        for reader, read in readers.items():
+            for name, profile in OcrProfile.profiles.items():
+                correct = 0
+                times = []
+                for *_, area, label in samples:
+                    start = time.perf_counter()
+                    text = read(area, profile)
+                    times.append(time.perf_counter() - start)
+                    correct += text.split() == label.split()
+                p50, p95, p99 = numpy.percentile(times, [50, 95, 99]) * 1000
+                results.append({"region": region, "reader": reader,
+                                 "profile": name, "crops": len(samples),
+                                 "accuracy": correct / len(samples),
+                                 "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                                 "reads_per_s": len(times) / sum(times)})
+                mark = "*" if name == assigned else " "
+                print(f"{mark}{reader:>18} {name:>10}: "
+                      f"{correct / len(samples):6.1%} correct, "
+                      f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, "
+                      f"{len(times) / sum(times):.0f} reads/s")
+                if reader == "Digits":
+                    break  # The profile makes no difference
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=1)
+    if baseline:
+        compare(results, baseline)
+
+
+def compare(results, baseline, slower=1.2):
+    """Print the results that got less accurate or slower than a baseline.
+
+    Keyword arguments:
+    results -- the results of corpus().
+    baseline -- JSON file saved by an earlier run of corpus().
+    slower -- p95 latency ratio that counts as slower. (default 1.2)
+    """
+    with open(baseline) as f:
+        old = {(r["region"], r["reader"], r["profile"]): r
+               for r in json.load(f)}
+    regressions = 0
+    for r in results:
+        before = old.get((r["region"], r["reader"], r["profile"]))
+        if not before:
+            continue
+        name = f"{r['region']} {r['reader']} {r['profile']}"
+        if r["accuracy"] < before["accuracy"]:
+            regressions += 1
+            print(f"{name}: accuracy {before['accuracy']:.1%} -> "
+                  f"{r['accuracy']:.1%}")
+        if r["p95_ms"] > before["p95_ms"] * slower:
+            regressions += 1
+            print(f"{name}: p95 {before['p95_ms']:.1f} ms -> "
+                  f"{r['p95_ms']:.1f} ms")
+    print(f"{regressions} regressions against {baseline}")
+
+
+def record(paths, folder="corpus"):
+    """Add the OCR regions of saved screenshots to the corpus folder.
+
+    Each region of ncon.OCR_REGIONS is cropped and labeled with what its
+    profile reads now. Check the labels in labels.json and fix the wrong
+    ones before benchmarking, the corpus is only as good as its labels.
+    """
+    if not paths:
+        raise SystemExit("Pass one or more saved screenshots")
+    data = Corpus(folder)
+    engine = OcrEngine.default()
+    for path in paths:
+        rgb = numpy.asarray(image.open(path).convert("RGB"))
+        # The game's 0, 0 is the pixel with TOP_LEFT_COLOR, as in main.py
+        found = PixelSearch.first(rgb[:608, :408], ncon.TOP_LEFT_COLOR)
+        if found is None:
+            print(f"{path}: no game window found, skipped")
+            continue
+        x, y = found
+        for region, (x1, y1, x2, y2, name) in ncon.OCR_REGIONS.items():
+            area = numpy.ascontiguousarray(rgb[y + y1:y + y2, x + x1:x + x2])
+            profile = OcrProfile.get(name)
+            label = engine.read(profile.prepare(area), profile.config)
+            file = data.add(region, area, label.strip())
+            print(f"{path}: {region}/{file} read as {label.strip()!r}")
+    engine.close()
+
+
+BENCHMARKS = {"pixel_search": pixel_search, "capture": capture,
+              "region": region, "templates": templates, "grabber": grabber,
+              "ocr": ocr, "digits": digits, "ocr_pool": ocr_pool,
+              "corpus": corpus, "record": record}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--json", help="save the corpus results to a file")
+    parser.add_argument("--baseline",
+                        help="compare the corpus results to a saved run")
+    args = parser.parse_args()
+    if args.benchmark == "corpus":
+        corpus(args.files, args.json, args.baseline)
+    elif args.json or args.baseline:
+        parser.error("--json and --baseline only apply to corpus")
+    else:
+        BENCHMARKS[args.benchmark](args.files)
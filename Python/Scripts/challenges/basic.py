@@ -1,5 +1,6 @@
 """Contains functions for running a basic challenge."""
 from classes.features import Features
+from classes.numberreader import NumberReader
 import ngucon as ncon
 import time
 
@@ -25,8 +26,7 @@ class Basic(Features):
             self.wandoos(True)
             self.fight()
 
-            tm_color = self.get_pixel_color(ncon.TMLOCKEDX, ncon.TMLOCKEDY)
-            if tm_color != ncon.TMLOCKEDCOLOR:
+            if self.status()["tm_unlocked"]:
                 self.send_string("r")
                 self.send_string("t")
                 self.time_machine(True)
@@ -45,8 +45,7 @@ class Basic(Features):
             self.gold_diggers(diggers)
             time.sleep(5)
 
-            bm_color = self.get_pixel_color(ncon.BMLOCKEDX, ncon.BMLOCKEDY)
-            if bm_color != ncon.BMLOCKEDCOLOR:
+            if self.status()["bm_unlocked"]:
                 self.menu("bloodmagic")
                 time.sleep(0.2)
                 self.send_string("t")
@@ -94,10 +93,11 @@ class Basic(Features):
                 blood_digger_active = True
                 self.gold_diggers([11], True)
             if time.time() > start + 90:
-                try:
-                    NGU_energy = int(self.remove_letters(self.ocr(ncon.OCR_ENERGY_X1,ncon.OCR_ENERGY_Y1,ncon.OCR_ENERGY_X2,ncon.OCR_ENERGY_Y2)))
-                    self.assign_ngu(NGU_energy, [1, 2, 4, 5, 6])
-                except ValueError:
+                NGU_energy, confidence = NumberReader.parse(
+                    self.ocr_region("energy"))
+                if confidence >= NumberReader.THRESHOLD:
+                    self.assign_ngu(int(NGU_energy), [1, 2, 4, 5, 6])
+                else:
                     print("couldn't assign e/m to NGUs")
                 time.sleep(0.5)
         self.gold_diggers([2, 3, 5, 9, 12], True)
@@ -46,8 +46,7 @@ class Level(Features):
         while not tm_unlocked:
             self.fight()
 
-            tm_color = self.get_pixel_color(ncon.TMLOCKEDX, ncon.TMLOCKEDY)
-            if tm_color != ncon.TMLOCKEDCOLOR:
+            if self.status()["tm_unlocked"]:
                 self.time_machine(True)
                 tm_unlocked = True
 
@@ -95,8 +94,7 @@ class Level(Features):
         while not tm_unlocked:
             self.fight()
 
-            tm_color = self.get_pixel_color(ncon.TMLOCKEDX, ncon.TMLOCKEDY)
-            if tm_color != ncon.TMLOCKEDCOLOR:
+            if self.status()["tm_unlocked"]:
                 self.time_machine(True)
                 tm_unlocked = True
 
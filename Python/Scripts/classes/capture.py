@@ -0,0 +1,165 @@
+"""Capture backends that keep their buffers between captures."""
+from PIL import Image as image
+import numpy
+import time
+
+
+class Frame():
+    """A captured frame.
+
+    bgrx is a (height, width, 4) array in the byte order GDI uses. It is
+    usually a view of the backend's buffer, so it is only valid until the
+    backend captures again. Use copy() to keep a frame around.
+    """
+
+    def __init__(self, bgrx, timestamp):
+        """Keyword arguments.
+
+        bgrx -- array of BGRX pixels, indexed [y, x].
+        timestamp -- time.perf_counter() of the capture.
+        """
+        self.bgrx = bgrx
+        self.timestamp = timestamp
+        self.bmp = None
+
+    @property
+    def width(self):
+        """Width of the frame in pixels."""
+        return self.bgrx.shape[1]
+
+    @property
+    def height(self):
+        """Height of the frame in pixels."""
+        return self.bgrx.shape[0]
+
+    @property
+    def rgb(self):
+        """Return an RGB view of the frame, without copying."""
+        return self.bgrx[..., 2::-1]
+
+    def pixel(self, x, y):
+        """Return the RGB tuple of the pixel at xy."""
+        b, g, r = self.bgrx[y, x, :3].tolist()
+        return r, g, b
+
+    def image(self):
+        """Return the frame as a Pillow image, converted on first use."""
+        if self.bmp is None:
+            self.bmp = image.frombuffer('RGB', (self.width, self.height),
+                                        self.bgrx, 'raw', 'BGRX', 0, 1)
+        return self.bmp
+
+    def copy(self):
+        """Return a frame that owns its pixels."""
+        return Frame(self.bgrx.copy(), self.timestamp)
+
+
+class Capture():
+    """Interface for capture backends.
+
+    A backend allocates its buffer once and reuses it until the size of the
+    window changes. allocations and grabs count how often that happened.
+    """
+
+    def __init__(self):
+        """Set up the counters, subclasses allocate their buffers lazily."""
+        self.buffer = None
+        self.allocations = 0
+        self.grabs = 0
+
+    def size(self):
+        """Return the width and height of the window."""
+        raise NotImplementedError
+
+    def allocate(self, width, height):
+        """Allocate the buffer for a window of this size."""
+        raise NotImplementedError
+
+    def copy(self):
+        """Copy the window into the buffer."""
+        raise NotImplementedError
+
+    def copy_region(self, x_start, y_start, x_end, y_end):
+        """Copy part of the window into the buffer, by default all of it."""
+        self.copy()
+
+    def release(self):
+        """Free everything allocated by allocate()."""
+        self.buffer = None
+
+    def prepare(self):
+        """Make sure the buffer matches the current size of the window."""
+        width, height = self.size()
+        if self.buffer is None or self.buffer.shape[:2] != (height, width):
+            self.release()
+            self.allocate(width, height)
+            self.allocations += 1
+
+    def grab(self):
+        """Capture the window and return a Frame viewing the buffer."""
+        self.prepare()
+        self.copy()
+        self.grabs += 1
+        return Frame(self.buffer, time.perf_counter())
+
+    def grab_region(self, x_start, y_start, x_end, y_end):
+        """Capture a rectangle of the window.
+
+        Coordinates are relative to the window, including its border. Returns
+        an RGB view of the rectangle, the rest of the buffer is left stale.
+        """
+        self.prepare()
+        self.copy_region(x_start, y_start, x_end, y_end)
+        self.grabs += 1
+        return self.buffer[y_start:y_end, x_start:x_end, 2::-1]
+
+
+class FakeCapture(Capture):
+    """In-memory backend that serves recorded frames.
+
+    Frames are cycled through in order, which makes it possible to run and
+    benchmark the capture code without a game window.
+    """
+
+    def __init__(self, frames, persistent=True):
+        """Keyword arguments.
+
+        frames -- list of Pillow images or RGB arrays.
+        persistent -- if False, a new buffer is allocated for every capture,
+                      like the old get_bitmap() did. (default True)
+        """
+        super().__init__()
+        self.frames = []
+        for f in frames:
+            rgb = numpy.asarray(f)[..., :3]
+            bgrx = numpy.full(rgb.shape[:2] + (4,), 255, dtype=numpy.uint8)
+            bgrx[..., 2::-1] = rgb
+            self.frames.append(bgrx)
+        self.persistent = persistent
+        self.index = 0
+
+    def size(self):
+        """Return the width and height of the next frame."""
+        height, width = self.frames[self.index].shape[:2]
+        return width, height
+
+    def allocate(self, width, height):
+        """Allocate the buffer for a window of this size."""
+        self.buffer = numpy.empty((height, width, 4), dtype=numpy.uint8)
+
+    def copy(self):
+        """Copy the next frame into the buffer."""
+        numpy.copyto(self.buffer, self.frames[self.index])
+        self.index = (self.index + 1) % len(self.frames)
+
+    def copy_region(self, x_start, y_start, x_end, y_end):
+        """Copy a rectangle of the next frame into the buffer."""
+        self.buffer[y_start:y_end, x_start:x_end] = (
+            self.frames[self.index][y_start:y_end, x_start:x_end])
+        self.index = (self.index + 1) % len(self.frames)
+
+    def prepare(self):
+        """Make sure the buffer matches the size of the next frame."""
+        if not self.persistent:
+            self.release()
+        super().prepare()
@@ -25,10 +25,7 @@ class Challenge(Features):
                                      ncon.CHALLENGEACTIVEY)
 
         if color == ncon.CHALLENGEACTIVECOLOR:
-            text = self.ocr(ncon.OCR_CHALLENGE_NAMEX1,
-                            ncon.OCR_CHALLENGE_NAMEY1,
-                            ncon.OCR_CHALLENGE_NAMEX2,
-                            ncon.OCR_CHALLENGE_NAMEY2)
+            text = self.ocr_region("challenge_name")
             print("A challenge is already active: " + text)
             if "basic" in text.lower():
                 print("Starting basic challenge script")
@@ -39,17 +36,18 @@ class Challenge(Features):
                 try:
                     x = ncon.CHALLENGEX
                     y = ncon.CHALLENGEY + challenge * ncon.CHALLENGEOFFSET
+                    # Wait for the tooltip that shows the target boss
+                    tooltip = self.area_changed(
+                        *ncon.OCR_REGIONS["24hc_target"][:4])
                     self.click(x, y, button="right")
-                    time.sleep(userset.LONG_SLEEP)
-                    target = self.ocr(ncon.OCR_CHALLENGE_24HC_TARGETX1,
-                                      ncon.OCR_CHALLENGE_24HC_TARGETY1,
-                                      ncon.OCR_CHALLENGE_24HC_TARGETX2,
-                                      ncon.OCR_CHALLENGE_24HC_TARGETY2)
-                    target = int(self.remove_letters(target))
+                    self.wait_until(tooltip, userset.LONG_SLEEP)
+                    target_text = self.ocr_region("24hc_target")
+                    target = int(self.remove_letters(target_text))
                     print(f"Found target boss: {target}")
                     b.basic(target)
                 except ValueError:
                     print("couldn't detect the target level of 24HC")
+                    self.archive_region("24hc_target", target_text)
                     Discord.send_message("Couldn't detect the" +
                                          " target level of 24HC", Discord.ERROR)
 
@@ -82,13 +80,13 @@ class Challenge(Features):
 
             elif challenge == 3:
                 try:
+                    # Wait for the tooltip that shows the target boss
+                    tooltip = self.area_changed(
+                        *ncon.OCR_REGIONS["24hc_target"][:4])
                     self.click(x, y, button="right")
-                    time.sleep(userset.LONG_SLEEP)
-                    target = self.ocr(ncon.OCR_CHALLENGE_24HC_TARGETX1,
-                                      ncon.OCR_CHALLENGE_24HC_TARGETY1,
-                                      ncon.OCR_CHALLENGE_24HC_TARGETX2,
-                                      ncon.OCR_CHALLENGE_24HC_TARGETY2)
-                    target = int(self.remove_letters(target))
+                    self.wait_until(tooltip, userset.LONG_SLEEP)
+                    target_text = self.ocr_region("24hc_target")
+                    target = int(self.remove_letters(target_text))
                     print(f"Found target boss: {target}")
                     self.click(x, y)
                     time.sleep(userset.LONG_SLEEP)
@@ -97,6 +95,7 @@ class Challenge(Features):
                     b.basic(target)
                 except ValueError:
                     print("couldn't detect the target level of 24HC")
+                    self.archive_region("24hc_target", target_text)
                     Discord.send_message("Couldn't detect the" +
                                          "target level of 24HC", Discord.ERROR)
 
@@ -0,0 +1,91 @@
+"""Colors packed into integers."""
+
+
+class Color(int):
+    """A color packed as an integer, 0xRRGGBB.
+
+    Colors compare and hash like integers, so checking a pixel is an integer
+    comparison. Hex strings are only used for display, str() returns one.
+    Comparing with a hex string still works, but is slower.
+    """
+
+    def __new__(cls, value):
+        """Create a color from a hex string, an (r, g, b) tuple or an int."""
+        if isinstance(value, str):
+            value = int(value, 16)
+        elif isinstance(value, (tuple, list)):
+            value = value[0] << 16 | value[1] << 8 | value[2]
+        return super().__new__(cls, value)
+
+    @property
+    def r(self):
+        """Red channel."""
+        return self >> 16 & 0xff
+
+    @property
+    def g(self):
+        """Green channel."""
+        return self >> 8 & 0xff
+
+    @property
+    def b(self):
+        """Blue channel."""
+        return self & 0xff
+
+    @property
+    def hex(self):
+        """Return the color as an uppercase hex string."""
+        return '%06X' % self
+
+    def __str__(self):
+        """Return the color as an uppercase hex string."""
+        return self.hex
+
+    def __repr__(self):
+        """Return a representation like Color('EB0000')."""
+        return f"Color('{self.hex}')"
+
+    def __eq__(self, other):
+        """Compare with another color, an int or a hex string."""
+        if other.__class__ is str:
+            try:
+                other = int(other, 16)
+            except ValueError:
+                return False
+        return int.__eq__(self, other)
+
+    def __ne__(self, other):
+        """Compare with another color, an int or a hex string."""
+        return not self == other
+
+    __hash__ = int.__hash__
+
+    def near(self, other, tolerance):
+        """Return True if no channel differs more than tolerance."""
+        other = Color(other)
+        return (abs(self.r - other.r) <= tolerance and
+                abs(self.g - other.g) <= tolerance and
+                abs(self.b - other.b) <= tolerance)
+
+
+class Palette(frozenset):
+    """A set of colors, checking membership is a single hash lookup."""
+
+    def __new__(cls, colors):
+        """Create a palette from colors in any format Color accepts."""
+        return super().__new__(cls, (Color(c) for c in colors))
+
+    def __contains__(self, color):
+        """Return True if the color is in the palette."""
+        if color.__class__ is str:
+            try:
+                color = int(color, 16)
+            except ValueError:
+                return False
+        return frozenset.__contains__(self, color)
+
+    def match(self, color, tolerance=0):
+        """Return True if the color is within tolerance of any color."""
+        if color in self:
+            return True
+        return tolerance > 0 and any(c.near(color, tolerance) for c in self)
@@ -0,0 +1,63 @@
+"""Labeled crops of OCR regions, for training and benchmarks."""
+from PIL import Image as image
+import hashlib
+import json
+import numpy
+import os
+
+
+class Corpus():
+    """A folder of labeled crops with one sub folder per region.
+
+    Each region folder holds PNG crops and a labels.json that maps the file
+    names to the text they show, for example corpus/boss/labels.json.
+    """
+
+    def __init__(self, path="corpus"):
+        """Keyword arguments.
+
+        path -- the corpus folder. (default "corpus")
+        """
+        self.path = path
+
+    def regions(self):
+        """Return the names of the regions in the corpus."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(d for d in os.listdir(self.path)
+                      if os.path.isdir(os.path.join(self.path, d)))
+
+    def labels(self, region):
+        """Return the labels of a region as {file name: text}."""
+        path = os.path.join(self.path, region, "labels.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def samples(self, region=None):
+        """Yield region, file name, RGB array and label of every crop.
+
+        Keyword arguments:
+        region -- only yield crops of this region. (default None)
+        """
+        for r in [region] if region else self.regions():
+            for name, label in sorted(self.labels(r).items()):
+                bmp = image.open(os.path.join(self.path, r, name))
+                yield r, name, numpy.asarray(bmp.convert("RGB")), label
+
+    def add(self, region, area, label):
+        """Save a crop with its label, return the file name.
+
+        Files are named by a hash of their pixels, so adding the same crop
+        twice only updates its label.
+        """
+        folder = os.path.join(self.path, region)
+        os.makedirs(folder, exist_ok=True)
+        name = hashlib.sha1(area.tobytes()).hexdigest()[:16] + ".png"
+        image.fromarray(area).save(os.path.join(folder, name))
+        labels = self.labels(region)
+        labels[name] = label
+        with open(os.path.join(folder, "labels.json"), "w") as f:
+            json.dump(labels, f, indent=1, sort_keys=True)
+        return name
@@ -0,0 +1,132 @@
+"""Read numbers written in the game's font without tesseract."""
+import cv2
+import numpy
+import os
+import re
+
+
+class Digits():
+    """Recognize numbers by comparing glyphs with an atlas of the font.
+
+    The atlas is learned from crops with known text, see learn(). A crop is
+    split into glyphs at empty columns, every glyph is scaled to a fixed
+    size and compared with all atlas glyphs at once by normalized
+    correlation. Reads that don't look like a number get no confidence.
+    """
+
+    # Where the atlas is stored
+    ATLAS = "glyphs.npz"
+    # Size glyphs are scaled to before they are compared
+    HEIGHT = 16
+    WIDTH = 10
+    # Score lost per unit of difference in width relative to line height
+    WIDTH_WEIGHT = 0.5
+    # Reads below this confidence should be left to tesseract
+    THRESHOLD = 0.8
+    # Samples kept per character
+    SAMPLES = 8
+    NUMBER = re.compile(r"\d[\d,]*(\.\d+)?(E\+?\d+)?$")
+
+    def __init__(self, path=None):
+        """Load the atlas, if there is one.
+
+        Keyword arguments:
+        path -- file to load the atlas from and save it to. (default ATLAS)
+        """
+        self.path = path or Digits.ATLAS
+        self.labels = []
+        self.vectors = numpy.empty((0, Digits.HEIGHT * Digits.WIDTH),
+                                   dtype=numpy.float32)
+        self.widths = numpy.empty(0, dtype=numpy.float32)
+        if os.path.exists(self.path):
+            self.load()
+
+    @staticmethod
+    def ink(area):
+        """Return a boolean array of the text pixels, or None if blank."""
+        gray = area.astype(numpy.float32)
+        if gray.ndim == 3:
+            gray = gray.mean(axis=2)
+        # The most common brightness along the edges is the background
+        edges = numpy.concatenate((gray[0], gray[-1], gray[:, 0], gray[:, -1]))
+        diff = numpy.abs(gray - numpy.median(edges))
+        if diff.max() < 48:
+            return None
+        return diff > diff.max() / 2
+
+    @staticmethod
+    def segment(ink):
+        """Split a line of text into glyphs at the empty columns."""
+        rows = numpy.flatnonzero(ink.any(axis=1))
+        line = ink[rows[0]:rows[-1] + 1]
+        columns = numpy.concatenate(([0], line.any(axis=0), [0]))
+        edges = numpy.flatnonzero(numpy.diff(columns.astype(numpy.int8)))
+        return [line[:, a:b] for a, b in zip(edges[::2], edges[1::2])]
+
+    @staticmethod
+    def features(glyphs):
+        """Return the normalized vectors and relative widths of glyphs."""
+        vectors = numpy.empty((len(glyphs), Digits.HEIGHT * Digits.WIDTH),
+                              dtype=numpy.float32)
+        for i, glyph in enumerate(glyphs):
+            v = cv2.resize(glyph.astype(numpy.float32),
+                           (Digits.WIDTH, Digits.HEIGHT),
+                           interpolation=cv2.INTER_AREA).ravel()
+            v -= v.mean()
+            norm = numpy.linalg.norm(v)
+            vectors[i] = v / norm if norm else v
+        widths = numpy.array([g.shape[1] / g.shape[0] for g in glyphs],
+                             dtype=numpy.float32)
+        return vectors, widths
+
+    def read(self, area):
+        """Return the text in a crop and the confidence of the read.
+
+        Confidence is the lowest glyph score, between 0 and 1. It is 0 if the
+        atlas is empty or the text isn't a number.
+        """
+        ink = self.ink(area)
+        if not self.labels or ink is None:
+            return "", 0
+        vectors, widths = self.features(self.segment(ink))
+        scores = vectors @ self.vectors.T - Digits.WIDTH_WEIGHT * numpy.abs(
+            widths[:, None] - self.widths[None, :])
+        best = scores.argmax(axis=1)
+        text = "".join(self.labels[i] for i in best)
+        if not Digits.NUMBER.match(text):
+            return text, 0
+        confidence = scores[numpy.arange(len(best)), best].min()
+        return text, max(float(confidence), 0)
+
+    def learn(self, area, text):
+        """Add the glyphs of a crop showing text to the atlas.
+
+        Returns False if the crop doesn't split into one glyph per character.
+        """
+        text = text.replace(" ", "")
+        ink = self.ink(area)
+        if ink is None:
+            return False
+        glyphs = self.segment(ink)
+        if len(glyphs) != len(text):
+            return False
+        vectors, widths = self.features(glyphs)
+        for c, vector, width in zip(text, vectors, widths):
+            if self.labels.count(c) >= Digits.SAMPLES:
+                continue
+            self.labels.append(c)
+            self.vectors = numpy.vstack((self.vectors, vector))
+            self.widths = numpy.append(self.widths, width)
+        return True
+
+    def load(self):
+        """Load the atlas from self.path."""
+        with numpy.load(self.path) as atlas:
+            self.labels = atlas["labels"].tolist()
+            self.vectors = atlas["vectors"]
+            self.widths = atlas["widths"]
+
+    def save(self):
+        """Save the atlas to self.path."""
+        numpy.savez(self.path, labels=numpy.array(self.labels),
+                    vectors=self.vectors, widths=self.widths)
@@ -1,11 +1,13 @@
 """Feature class handles the different features in the game."""
 from classes.inputs import Inputs
 from classes.navigation import Navigation
+from classes.pixelsearch import PixelSearch
 from classes.window import Window
 from collections import deque
 from decimal import Decimal
 import math
 import ngucon as ncon
+import numpy
 import re
 import time
 import win32con as wcon
@@ -17,31 +19,46 @@ class Features(Navigation, Inputs):
     """Handles the different features in the game."""
 
     def merge_equipment(self):
-        """Navigate to inventory and merge equipment."""
+        """Navigate to inventory and merge equipment.
+
+        The clicks are sent as one batch, see Inputs.queue_inputs().
+        """
         self.menu("inventory")
+        commands = []
         for slot in self.equipment:
             if (slot == "cube"):
-                return
-            self.click(self.equipment[slot]["x"], self.equipment[slot]["y"])
-            self.send_string("d")
+                break
+            commands.append(self.click_command(self.equipment[slot]["x"],
+                                               self.equipment[slot]["y"]))
+            commands.append(self.key_command("d"))
+        self.queue_inputs(commands).result()
 
     def boost_equipment(self):
-        """Boost all equipment."""
+        """Boost all equipment.
+
+        The clicks are sent as one batch, see Inputs.queue_inputs().
+        """
         self.menu("inventory")
+        commands = []
         for slot in self.equipment:
             if (slot == "cube"):
-                self.click(self.equipment[slot]["x"],
-                           self.equipment[slot]["y"], "right")
-                return
-            self.click(self.equipment[slot]["x"], self.equipment[slot]["y"])
-            self.send_string("a")
+                commands.append(self.click_command(self.equipment[slot]["x"],
+                                                   self.equipment[slot]["y"],
+                                                   "right"))
+                break
+            commands.append(self.click_command(self.equipment[slot]["x"],
+                                               self.equipment[slot]["y"]))
+            commands.append(self.key_command("a"))
+        self.queue_inputs(commands).result()
 
     def get_current_boss(self):
         """Go to fight and read current boss number."""
         self.menu("fight")
-        boss = self.ocr(ncon.OCRBOSSX1, ncon.OCRBOSSY1, ncon.OCRBOSSX2,
-                        ncon.OCRBOSSY2, debug=False)
-        return self.remove_letters(boss)
+        text = self.ocr_region("boss")
+        boss = self.remove_letters(text)
+        if not boss:
+            self.archive_region("boss", text)
+        return boss
 
     def nuke(self, boss=None):
         """Navigate to Fight Boss and Nuke or Fast Fight."""
@@ -97,7 +114,8 @@ class Features(Navigation, Inputs):
         """
         self.menu("adventure")
         if itopod:
-            self.click(ncon.ITOPODX, ncon.ITOPODY)
+            # Opens the ITOPOD dialog, its buttons are clicked next
+            self.click(ncon.ITOPODX, ncon.ITOPODY, action="submenu")
             if itopodauto:
                 self.click(ncon.ITOPODENDX, ncon.ITOPODENDY)
                 # set end to 0 in case it's higher than start
@@ -132,6 +150,9 @@ class Features(Navigation, Inputs):
         highest -- If set to true, it will go to your highest available
                    non-titan zone.
         bosses -- If set to true, it will only kill bosses
+
+        Start the grabber with start_grabber() to react to new monsters as
+        soon as they show up.
         """
         self.menu("adventure")
         if highest:
@@ -150,10 +171,12 @@ class Features(Navigation, Inputs):
 
         end = time.time() + duration
         while time.time() < end:
-            health = self.get_pixel_color(ncon.HEALTHX, ncon.HEALTHY)
+            health, crown = self.get_pixel_colors([(ncon.HEALTHX,
+                                                    ncon.HEALTHY),
+                                                   (ncon.CROWNX,
+                                                    ncon.CROWNY)])
             if (health == ncon.NOTDEAD):
                 if bosses:
-                    crown = self.get_pixel_color(ncon.CROWNX, ncon.CROWNY)
                     if (crown == ncon.ISBOSS):
                         while (health != ncon.DEAD):
                             health = self.get_pixel_color(ncon.HEALTHX,
@@ -176,9 +199,10 @@ class Features(Navigation, Inputs):
                         time.sleep(0.03)
                         win32gui.PostMessage(Window.id, wcon.WM_KEYUP,
                                              wcon.VK_RIGHT, 0)
+                        self.invalidate_frame()
                 else:
                     self.click(ncon.ABILITY_ATTACKX, ncon.ABILITY_ATTACKY)
-            time.sleep(0.01)
+            self.wait_frame()
 
         self.click(ncon.IDLE_BUTTONX, ncon.IDLE_BUTTONY)
 
@@ -188,6 +212,9 @@ class Features(Navigation, Inputs):
         Keyword arguments:
         duration -- Duration in seconds to snipe, before toggling idle mode
                     back on and returning.
+
+        Start the grabber with start_grabber() to react to new monsters as
+        soon as they show up.
         """
         end = time.time() + duration
 
@@ -215,7 +242,7 @@ class Features(Navigation, Inputs):
             if health != ncon.DEAD:
                 self.click(ncon.ABILITY_ATTACKX, ncon.ABILITY_ATTACKY)
             else:
-                time.sleep(0.01)
+                self.wait_frame()
 
         self.click(ncon.IDLE_BUTTONX, ncon.IDLE_BUTTONY)
 
@@ -230,10 +257,30 @@ class Features(Navigation, Inputs):
         self.click(ncon.CONFIRMX, ncon.CONFIRMY)
         return
 
-    def pit(self):
-        """Throws money into the pit."""
-        color = self.get_pixel_color(ncon.PITCOLORX, ncon.PITCOLORY)
-        if (color == ncon.PITREADY):
+    def status(self):
+        """Return which sidebar indicators are lit, from one probe.
+
+        The keys are "pit", "save", "bloodpill", "tm_unlocked" and
+        "bm_unlocked".
+        """
+        pit, save, bm, tm = self.get_pixel_colors(
+            [(ncon.PITCOLORX, ncon.PITCOLORY), (ncon.SAVEX, ncon.SAVEY),
+             (ncon.BMLOCKEDX, ncon.BMLOCKEDY),
+             (ncon.TMLOCKEDX, ncon.TMLOCKEDY)])
+        return {"pit": pit == ncon.PITREADY,
+                "save": save == ncon.SAVE_READY_COLOR,
+                "bloodpill": bm == ncon.BM_PILL_READY,
+                "tm_unlocked": tm != ncon.TMLOCKEDCOLOR,
+                "bm_unlocked": bm != ncon.BMLOCKEDCOLOR}
+
+    def pit(self, status=None):
+        """Throws money into the pit.
+
+        Keyword arguments:
+        status -- a result of status() to use instead of probing again.
+                  (default None)
+        """
+        if (status or self.status())["pit"]:
             self.menu("pit")
             self.click(ncon.PITX, ncon.PITY)
             self.click(ncon.CONFIRMX, ncon.CONFIRMY)
@@ -253,8 +300,7 @@ class Features(Navigation, Inputs):
         self.menu("augmentations")
         for k in augments:
             val = math.floor(augments[k] * energy)
-            self.input_box()
-            self.send_string(str(val))
+            self.input_number(val)
             # Scroll down if we have to.
             bottom_augments = ["AE", "ES", "LS", "QSL"]
             i = 0
@@ -292,8 +338,7 @@ class Features(Navigation, Inputs):
     def time_machine(self, magic=False):
         """Add energy and/or magic to TM."""
         self.menu("timemachine")
-        self.input_box()
-        self.send_string("600000000")
+        self.input_number(600000000)
         self.click(ncon.TMSPEEDX, ncon.TMSPEEDY)
         if magic:
             self.click(ncon.TMMULTX, ncon.TMMULTY)
@@ -301,8 +346,8 @@ class Features(Navigation, Inputs):
     def blood_magic(self, target):
         """Assign magic to BM."""
         self.menu("bloodmagic")
-        for i in range(target):
-            self.click(ncon.BMX, ncon.BMY[i])
+        self.click_many([(ncon.BMX, ncon.BMY[i])
+                         for i in range(target)]).result()
 
     def wandoos(self, magic=False):
         """Assign energy and/or magic to wandoos."""
@@ -318,8 +363,7 @@ class Features(Navigation, Inputs):
 
     def speedrun_bloodpill(self):
         """Check if bloodpill is ready to cast."""
-        bm_color = self.get_pixel_color(ncon.BMLOCKEDX, ncon.BMLOCKEDY)
-        if bm_color == ncon.BM_PILL_READY:
+        if self.status()["bloodpill"]:
             start = time.time()
             self.blood_magic(8)
             self.spells()
@@ -373,17 +417,15 @@ class Features(Navigation, Inputs):
         else:
             self.menu("ngu")
 
-        bmp = self.get_bitmap()
+        regions = {k: (ncon.OCR_NGU_E_X1, ncon.OCR_NGU_E_Y1 + k * 35,
+                       ncon.OCR_NGU_E_X2, ncon.OCR_NGU_E_Y2 + k * 35,
+                       ncon.OCR_NGU_PROFILE)
+                   for k in ngu}
         current_ngu = {}
         try:
-            for k in ngu:
-                y1 = ncon.OCR_NGU_E_Y1 + k * 35
-                y2 = ncon.OCR_NGU_E_Y2 + k * 35
+            for k, res in self.ocr_many(regions, numbers=True).items():
                 # remove commas from sub level 1 million NGU's.
-                res = re.sub(',', '', self.ocr(ncon.OCR_NGU_E_X1, y1,
-                                               ncon.OCR_NGU_E_X2, y2, False,
-                                               bmp))
-                current_ngu[k] = res
+                current_ngu[k] = re.sub(',', '', res)
             # find highest and lowest NGU's.
             high = max(current_ngu.keys(),
                        key=(lambda i: float(current_ngu[i])))
@@ -397,16 +439,16 @@ class Features(Navigation, Inputs):
                         self.click(ncon.NGU_TARGETX, ncon.NGU_TARGETY + 35 * k)
 
                         """We're casting as float to convert scientific notation
-                        into something usable, then casting as int to get rid
-                        of decimal."""
+                        into something usable, send_number() gets rid of the
+                        decimal. The target boxes only take plain numbers."""
 
-                        self.send_string(str(int(float(current_ngu[high]))))
+                        self.send_number(float(current_ngu[high]), False)
                 return False
             # Otherwise increase target level by 25%.
             else:
                 for k in current_ngu:
                     self.click(ncon.NGU_TARGETX, ncon.NGU_TARGETY + 35 * k)
-                    self.send_string(str(int(float(current_ngu[k]) * 1.25)))
+                    self.send_number(float(current_ngu[k]) * 1.25, False)
                 return True
 
         except ValueError:
@@ -428,8 +470,7 @@ class Features(Navigation, Inputs):
         else:
             self.menu("ngu")
 
-        self.input_box()
-        self.send_string(str(int(value // len(targets))))
+        self.input_number(value // len(targets))
         for i in targets:
             self.click(ncon.NGU_PLUSX, ncon.NGU_PLUSY + i * 35)
 
@@ -440,16 +481,23 @@ class Features(Navigation, Inputs):
         targets -- Array of diggers to use from 1-12. Example: [1, 2, 3, 4, 9].
         activate -- Set to True if you wish to activate/deactivate these
                     diggers otherwise it will just try to up the cap.
+
+        The clicks are sent as one batch, see Inputs.queue_inputs().
         """
         self.menu("digger")
+        commands = []
         for i in targets:
             page = ((i-1)//4)
             item = i - (page * 4)
-            self.click(ncon.DIG_PAGEX[page], ncon.DIG_PAGEY)
-            self.click(ncon.DIG_CAP[item]["x"], ncon.DIG_CAP[item]["y"])
+            commands.append(self.click_command(ncon.DIG_PAGEX[page],
+                                               ncon.DIG_PAGEY,
+                                               action="submenu"))
+            commands.append(self.click_command(ncon.DIG_CAP[item]["x"],
+                                               ncon.DIG_CAP[item]["y"]))
             if activate:
-                self.click(ncon.DIG_ACTIVE[item]["x"],
-                           ncon.DIG_ACTIVE[item]["y"])
+                commands.append(self.click_command(ncon.DIG_ACTIVE[item]["x"],
+                                                   ncon.DIG_ACTIVE[item]["y"]))
+        self.queue_inputs(commands).result()
 
     def bb_ngu(self, value, targets, overcap=1, magic=False):
         """Estimates the BB value of each supplied NGU.
@@ -463,33 +511,58 @@ class Features(Navigation, Inputs):
         else:
             self.menu("ngu")
 
-        self.input_box()
-        self.send_string(str(int(value)))
+        self.input_number(value)
 
         for target in targets:
             self.click(ncon.NGU_PLUSX, ncon.NGU_PLUSY + target * 35)
 
+        fill = self.get_ngu_fill()
         for target in targets:
-            for x in range(198):
-                color = self.get_pixel_color(ncon.NGU_BAR_MINX + x,
-                                             ncon.NGU_BAR_Y +
-                                             ncon.NGU_BAR_OFFSETY * target,
-                                             )
-                if color == ncon.NGU_BAR_WHITE:
-                    pixel_coefficient = x / 198
-                    value_coefficient = overcap / pixel_coefficient
-                    energy = (value_coefficient * value) - value
-                    #print(f"estimated energy to BB this NGU is {Decimal(energy):.2E}")
-                    break
-            self.input_box()
-            self.send_string(str(int(energy)))
+            if not fill[target]:
+                print(f"NGU {target} has no progress, can't estimate BB")
+                continue
+            value_coefficient = overcap / fill[target]
+            energy = (value_coefficient * value) - value
+            #print(f"estimated energy to BB this NGU is {Decimal(energy):.2E}")
+            self.input_number(energy)
             self.click(ncon.NGU_PLUSX, ncon.NGU_PLUSY + target * 35)
 
+    def get_ngu_fill(self):
+        """Return how far each NGU progress bar is filled, from 0 to 1.
+
+        Reads all nine bars of the current energy or magic NGU screen from
+        one capture and returns a dictionary with the fill per NGU,
+        {1: 0.42, 2: 0.1, ...}. The edge pixel of each bar is blended with the
+        white background, the blend is used to estimate the fill with
+        sub-pixel precision.
+        """
+        width = ncon.NGU_BAR_MAXX - ncon.NGU_BAR_MINX + 1
+        area = self.get_region(ncon.NGU_BAR_MINX,
+                               ncon.NGU_BAR_Y + ncon.NGU_BAR_OFFSETY,
+                               ncon.NGU_BAR_MAXX + 1,
+                               ncon.NGU_BAR_Y + ncon.NGU_BAR_OFFSETY * 9 + 1)
+        rows = area[::ncon.NGU_BAR_OFFSETY]
+        white = (PixelSearch.pack(rows) ==
+                 PixelSearch.to_int(ncon.NGU_BAR_WHITE))
+        # Index of the first white pixel, or the width if the bar is full
+        edge = numpy.where(white.any(axis=1), white.argmax(axis=1), width)
+
+        fill = edge.astype(numpy.float32)
+        rows = rows.astype(numpy.float32)
+        for i in numpy.flatnonzero(edge > 0):
+            bar = rows[i, 0]
+            last = rows[i, edge[i] - 1]
+            span = 255 - bar
+            valid = span > 8  # Channels where the bar differs from white
+            if valid.any():
+                covered = ((255 - last[valid]) / span[valid]).mean()
+                fill[i] += min(max(covered, 0), 1) - 1
+        return {k: float(fill[k - 1]) / width for k in range(1, 10)}
+
     def advanced_training(self, value):
         self.menu("advtraining")
         value = value // 2
-        self.input_box()
-        self.send_string(value)
+        self.input_number(value)
         self.click(ncon.ADV_TRAININGX, ncon.ADV_TRAINING1Y)
         self.click(ncon.ADV_TRAININGX, ncon.ADV_TRAINING2Y)
 
@@ -502,11 +575,10 @@ class Features(Navigation, Inputs):
                   "BEAST4"]
         """
         self.menu("adventure")
-        bmp = self.get_bitmap()
-        power = self.ocr(ncon.OCR_ADV_POWX1, ncon.OCR_ADV_POWY1,
-                         ncon.OCR_ADV_POWX2, ncon.OCR_ADV_POWY2, bmp=bmp)
-        tough = self.ocr(ncon.OCR_ADV_TOUGHX1, ncon.OCR_ADV_TOUGHY1,
-                         ncon.OCR_ADV_TOUGHX2, ncon.OCR_ADV_TOUGHY2, bmp=bmp)
+        pt = self.ocr_many({"power": ncon.OCR_REGIONS["power"],
+                            "tough": ncon.OCR_REGIONS["tough"]}, numbers=True)
+        power = pt["power"]
+        tough = pt["tough"]
 
         if (float(power) > ncon.TITAN_PT[target]["p"] and
            float(tough) > ncon.TITAN_PT[target]["t"]):
@@ -539,13 +611,14 @@ class Features(Navigation, Inputs):
 
         time.sleep(userset.LONG_SLEEP)
 
-        available = self.ocr(ncon.OCR_ADV_TITANX1, ncon.OCR_ADV_TITANY1,
-                             ncon.OCR_ADV_TITANX2, ncon.OCR_ADV_TITANY2)
+        available = self.ocr_region("titan")
 
         if "titan" in available.lower():
-            time.sleep(1.5)  # Make sure titans spawn, otherwise loop breaks
+            # Make sure titans spawn, otherwise loop breaks
+            self.wait_until(self.pixel_is(ncon.HEALTHX, ncon.HEALTHY,
+                                          ncon.NOTDEAD), 1.5)
             queue = deque(self.get_ability_queue())
-            health = ""
+            health = None
             while health != ncon.DEAD:
                 if len(queue) == 0:
                     print("NEW QUEUE")
@@ -568,9 +641,10 @@ class Features(Navigation, Inputs):
 
                 self.click(x, y)
                 time.sleep(userset.LONG_SLEEP)
-                color = self.get_pixel_color(ncon.ABILITY_ROW1X,
-                                             ncon.ABILITY_ROW1Y)
-                health = self.get_pixel_color(ncon.HEALTHX, ncon.HEALTHY)
+                color, health = self.get_pixel_colors([(ncon.ABILITY_ROW1X,
+                                                        ncon.ABILITY_ROW1Y),
+                                                       (ncon.HEALTHX,
+                                                        ncon.HEALTHY)])
 
                 while color != ncon.ABILITY_ROW1_READY_COLOR:
                     time.sleep(0.03)
@@ -579,32 +653,32 @@ class Features(Navigation, Inputs):
 
     def get_ability_queue(self):
         """Return a queue of usable abilities."""
-        ready = []
         queue = []
+        points = []
+        ready_colors = []
 
-        # Add all abilities that are ready to the ready array
+        # Probe every ability and the heal threshold in one capture
         for i in range(13):
             if i <= 4:
                 x = ncon.ABILITY_ROW1X + i * ncon.ABILITY_OFFSETX
                 y = ncon.ABILITY_ROW1Y
-                color = self.get_pixel_color(x, y)
-                if color == ncon.ABILITY_ROW1_READY_COLOR:
-                    ready.append(i)
-            if i >= 5 and i <= 10:
+                ready_colors.append(ncon.ABILITY_ROW1_READY_COLOR)
+            elif i <= 10:
                 x = ncon.ABILITY_ROW2X + (i - 5) * ncon.ABILITY_OFFSETX
                 y = ncon.ABILITY_ROW2Y
-                color = self.get_pixel_color(x, y)
-                if color == ncon.ABILITY_ROW2_READY_COLOR:
-                    ready.append(i)
-            if i > 10:
+                ready_colors.append(ncon.ABILITY_ROW2_READY_COLOR)
+            else:
                 x = ncon.ABILITY_ROW3X + (i - 11) * ncon.ABILITY_OFFSETX
                 y = ncon.ABILITY_ROW3Y
-                color = self.get_pixel_color(x, y)
-                if color == ncon.ABILITY_ROW3_READY_COLOR:
-                    ready.append(i)
+                ready_colors.append(ncon.ABILITY_ROW3_READY_COLOR)
+            points.append((x, y))
+        points.append((ncon.PLAYER_HEAL_THRESHOLDX,
+                       ncon.PLAYER_HEAL_THRESHOLDY))
+        *colors, health = self.get_pixel_colors(points)
+
+        # Add all abilities that are ready to the ready array
+        ready = [i for i in range(13) if colors[i] == ready_colors[i]]
 
-        health = self.get_pixel_color(ncon.PLAYER_HEAL_THRESHOLDX,
-                                      ncon.PLAYER_HEAL_THRESHOLDY)
         # heal if we need to heal
         if health == ncon.PLAYER_HEAL_COLOR:
             if 12 in ready:
@@ -629,13 +703,16 @@ class Features(Navigation, Inputs):
 
         return queue
 
-    def save_check(self):
+    def save_check(self, status=None):
         """Check if we can do the daily save for AP.
 
         Make sure no window in your browser pops up when you click the "Save"
         button, otherwise sit will mess with the rest of the script.
+
+        Keyword arguments:
+        status -- a result of status() to use instead of probing again.
+                  (default None)
         """
-        color = self.get_pixel_color(ncon.SAVEX, ncon.SAVEY)
-        if color == ncon.SAVE_READY_COLOR:
+        if (status or self.status())["save"]:
             self.click(ncon.SAVEX, ncon.SAVEY)
         return
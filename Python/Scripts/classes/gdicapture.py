@@ -0,0 +1,108 @@
+"""Capture the game window through a persistent GDI context."""
+from classes.capture import Capture
+from classes.window import Window as window
+import ctypes
+import numpy
+import win32gui
+
+gdi32 = ctypes.WinDLL("gdi32")
+user32 = ctypes.WinDLL("user32")
+gdi32.CreateDIBSection.restype = ctypes.c_void_p
+gdi32.CreateDIBSection.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
+                                   ctypes.c_uint,
+                                   ctypes.POINTER(ctypes.c_void_p),
+                                   ctypes.c_void_p, ctypes.c_uint]
+gdi32.IntersectClipRect.argtypes = [ctypes.c_void_p, ctypes.c_int,
+                                    ctypes.c_int, ctypes.c_int, ctypes.c_int]
+gdi32.SelectClipRgn.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+user32.PrintWindow.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
+                               ctypes.c_uint]
+
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    """BITMAPINFOHEADER from wingdi.h."""
+
+    _fields_ = [("biSize", ctypes.c_uint32),
+                ("biWidth", ctypes.c_int32),
+                ("biHeight", ctypes.c_int32),
+                ("biPlanes", ctypes.c_uint16),
+                ("biBitCount", ctypes.c_uint16),
+                ("biCompression", ctypes.c_uint32),
+                ("biSizeImage", ctypes.c_uint32),
+                ("biXPelsPerMeter", ctypes.c_int32),
+                ("biYPelsPerMeter", ctypes.c_int32),
+                ("biClrUsed", ctypes.c_uint32),
+                ("biClrImportant", ctypes.c_uint32)]
+
+
+class GdiCapture(Capture):
+    """Capture the window with PrintWindow into a DIB section.
+
+    The memory DC and the DIB section are kept until the window changes
+    size. PrintWindow draws straight into the DIB memory, which the buffer
+    views, so no pixels are copied after the capture.
+    """
+
+    def __init__(self):
+        """Start without any GDI objects, they are created on first grab."""
+        super().__init__()
+        self.mem_dc = None
+        self.dib = None
+        self.old_bitmap = None
+
+    def size(self):
+        """Return the width and height of the window."""
+        left, top, right, bot = win32gui.GetWindowRect(window.id)
+        return right - left, bot - top
+
+    def allocate(self, width, height):
+        """Create the memory DC and a top-down 32 bit DIB section."""
+        hwnd_dc = win32gui.GetWindowDC(window.id)
+        self.mem_dc = win32gui.CreateCompatibleDC(hwnd_dc)
+        win32gui.ReleaseDC(window.id, hwnd_dc)
+
+        header = BITMAPINFOHEADER()
+        header.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        header.biWidth = width
+        header.biHeight = -height  # Negative height means top-down rows
+        header.biPlanes = 1
+        header.biBitCount = 32
+        header.biCompression = 0  # BI_RGB
+        bits = ctypes.c_void_p()
+        self.dib = gdi32.CreateDIBSection(self.mem_dc, ctypes.byref(header),
+                                          0, ctypes.byref(bits), None, 0)
+        if not self.dib:
+            self.release()
+            raise RuntimeError("Couldn't create capture bitmap")
+        self.old_bitmap = win32gui.SelectObject(self.mem_dc, self.dib)
+        data = (ctypes.c_ubyte * (width * height * 4)).from_address(bits.value)
+        self.buffer = numpy.ctypeslib.as_array(data).reshape(height, width, 4)
+
+    def copy(self):
+        """Let the window paint itself into the DIB section."""
+        user32.PrintWindow(window.id, self.mem_dc, 0)
+        gdi32.GdiFlush()
+
+    def copy_region(self, x_start, y_start, x_end, y_end):
+        """Let the window paint only a rectangle into the DIB section.
+
+        PrintWindow has no source rectangle, but painting honors the clip
+        region of the target DC, so only the rectangle is written.
+        """
+        gdi32.IntersectClipRect(self.mem_dc, x_start, y_start, x_end, y_end)
+        user32.PrintWindow(window.id, self.mem_dc, 0)
+        gdi32.SelectClipRgn(self.mem_dc, None)
+        gdi32.GdiFlush()
+
+    def release(self):
+        """Delete the DIB section and the memory DC."""
+        self.buffer = None
+        if self.mem_dc:
+            if self.old_bitmap:
+                win32gui.SelectObject(self.mem_dc, self.old_bitmap)
+            win32gui.DeleteDC(self.mem_dc)
+        if self.dib:
+            win32gui.DeleteObject(self.dib)
+        self.mem_dc = None
+        self.dib = None
+        self.old_bitmap = None
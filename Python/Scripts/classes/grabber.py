@@ -0,0 +1,100 @@
+"""Capture frames on a background thread."""
+from classes.capture import Frame
+from collections import deque
+import numpy
+import threading
+import time
+
+
+class Grabber(threading.Thread):
+    """Capture frames at a fixed rate into a small ring buffer.
+
+    The ring holds preallocated arrays that are reused for every capture.
+    latest() returns the newest frame without blocking. A frame stays
+    intact until the grabber has wrapped around the ring, so copy it if you
+    keep it for longer than a few frames.
+
+    Only the grabber may use the capture backend while it is running.
+    """
+
+    def __init__(self, capture, rate=60, slots=3):
+        """Keyword arguments.
+
+        capture -- the Capture backend to grab frames from.
+        rate -- frames per second to capture. (default 60)
+        slots -- number of frames in the ring buffer. (default 3)
+        """
+        super().__init__(daemon=True)
+        self.capture = capture
+        self.interval = 1 / rate
+        self.buffers = [None] * slots
+        self.frames = [None] * slots
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.running = threading.Event()
+        # Time between the starts of the last captures, for jitter stats
+        self.intervals = deque(maxlen=1000)
+
+    def start(self):
+        """Start capturing."""
+        self.running.set()
+        super().start()
+
+    def stop(self):
+        """Stop capturing and wait for the thread to finish."""
+        self.running.clear()
+        self.join()
+
+    def run(self):
+        """Capture frames until stopped."""
+        next_time = time.perf_counter()
+        last_start = None
+        while self.running.is_set():
+            start = time.perf_counter()
+            if last_start is not None:
+                self.intervals.append(start - last_start)
+            last_start = start
+
+            frame = self.capture.grab()
+            i = (self.seq + 1) % len(self.buffers)
+            buffer = self.buffers[i]
+            if buffer is None or buffer.shape != frame.bgrx.shape:
+                buffer = numpy.empty_like(frame.bgrx)
+                self.buffers[i] = buffer
+            numpy.copyto(buffer, frame.bgrx)
+            with self.condition:
+                # Stamped with the start, the frame shows no later inputs
+                self.frames[i] = Frame(buffer, start)
+                self.seq += 1
+                self.condition.notify_all()
+
+            next_time += self.interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.perf_counter()  # Fell behind, don't burst
+
+    def latest(self):
+        """Return the newest frame and its sequence number.
+
+        The frame is None until the first capture is done.
+        """
+        with self.condition:
+            return self.frames[self.seq % len(self.frames)], self.seq
+
+    def wait(self, seq, timeout=None):
+        """Wait for a frame newer than seq, return it and its number.
+
+        Returns the newest frame even if none arrived within timeout.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > seq, timeout)
+            return self.frames[self.seq % len(self.frames)], self.seq
+
+    def jitter(self):
+        """Return the mean, standard deviation and worst capture interval."""
+        if not self.intervals:
+            return 0, 0, 0
+        intervals = numpy.array(self.intervals)
+        return intervals.mean(), intervals.std(), intervals.max()
@@ -0,0 +1,115 @@
+"""Send batches of inputs to the window from a background thread."""
+from classes.numberkeys import NumberKeys
+from concurrent.futures import Future
+import queue
+import threading
+import time
+import win32api
+import win32con as wcon
+
+
+class InputQueue(threading.Thread):
+    """Dispatch batches of clicks and keys in order.
+
+    A command is a list of (message, wParam, lParam) tuples and the gap
+    to keep after it, see click() and keys(). The messages are built when
+    the command is made, so the dispatcher only posts them. It waits for
+    modifier keys once per batch instead of before every message.
+
+    submit() returns a Future that is done once the whole batch was sent
+    and the gap after its last command has passed. Until start() is
+    called, submit() sends the batch on the calling thread.
+    """
+
+    def __init__(self, post, wait, sent=None):
+        """Keyword arguments.
+
+        post -- function(message, wParam, lParam) posting to the window.
+        wait -- function returning once inputs may be sent, like when the
+                user lets go of the modifier keys, see Modifiers.wait().
+        sent -- function called after each command. (default None)
+        """
+        super().__init__(daemon=True)
+        self.post = post
+        self.wait = wait
+        self.sent = sent
+        self.batches = queue.Queue()
+        self.commands = 0
+        self.batch_count = 0
+
+    @staticmethod
+    def click(x, y, button="left", gap=0):
+        """Return the command that clicks at window pixel xy.
+
+        Keyword arguments:
+        button -- "left" or "right". (default "left")
+        gap -- seconds to wait before the next command. (default 0)
+        """
+        lParam = win32api.MAKELONG(x, y)
+        if button == "left":
+            down, up, flag = (wcon.WM_LBUTTONDOWN, wcon.WM_LBUTTONUP,
+                              wcon.MK_LBUTTON)
+        else:
+            down, up, flag = (wcon.WM_RBUTTONDOWN, wcon.WM_RBUTTONUP,
+                              wcon.MK_RBUTTON)
+        # MOUSEMOVE event is required for game to register clicks correctly
+        return ([(wcon.WM_MOUSEMOVE, 0, lParam), (down, flag, lParam),
+                 (up, flag, lParam)], gap)
+
+    @staticmethod
+    def keys(text, gap=0):
+        """Return the command that types text, see NumberKeys.messages().
+
+        Keyword arguments:
+        gap -- seconds to wait before the next command. (default 0)
+        """
+        return ([(message, key, 0) for message, key
+                 in NumberKeys.messages(text)], gap)
+
+    def submit(self, commands):
+        """Queue a batch of commands, returns a Future of its completion."""
+        future = Future()
+        if self.is_alive():
+            self.batches.put((commands, future))
+        else:
+            self.send(commands, future)
+        return future
+
+    def stop(self):
+        """Stop after the queued batches and wait for the thread."""
+        self.batches.put(None)
+        self.join()
+
+    def run(self):
+        """Send queued batches until stopped."""
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            self.send(*batch)
+
+    def send(self, commands, future):
+        """Send a batch and complete its future."""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            self.wait()
+            due = 0
+            for messages, gap in commands:
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                for message in messages:
+                    self.post(*message)
+                if self.sent:
+                    self.sent()
+                due = time.perf_counter() + gap
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        self.commands += len(commands)
+        self.batch_count += 1
+        future.set_result(len(commands))
@@ -1,139 +1,400 @@
 """Input class contains functions for mouse and keyboard input."""
+from classes.color import Color
+from classes.digits import Digits
+from classes.gdicapture import GdiCapture
+from classes.grabber import Grabber
+from classes.inputqueue import InputQueue
+from classes.modifiers import Modifiers
+from classes.numberkeys import NumberKeys
+from classes.numberreader import NumberReader
+from classes.ocrcache import OcrCache
+from classes.ocrengine import OcrEngine
+from classes.ocrpool import OcrPool
+from classes.ocrprofile import OcrProfile
+from classes.pixelsearch import PixelSearch
+from classes.regions import Regions
+from classes.samplearchive import SampleArchive
+from classes.templates import Templates
+from classes.timing import Timing
 from classes.window import Window as window
-from ctypes import windll
-from PIL import Image as image
-from PIL import ImageFilter
+from concurrent.futures import Future
 import cv2
 import ngucon as ncon
 import usersettings as userset
 import numpy
-import pytesseract
 import re
 import time
-import win32api
-import win32con as wcon
 import win32gui
-import win32ui
 
 
 class Inputs():
-    """This class handles inputs."""
-
-    def click(self, x, y, button="left", fast=False):
-        """Click at pixel xy."""
-        x += window.x
-        y += window.y
-        lParam = win32api.MAKELONG(x, y)
-        # MOUSEMOVE event is required for game to register clicks correctly
-        win32gui.PostMessage(window.id, wcon.WM_MOUSEMOVE, 0, lParam)
-        while (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
-               win32api.GetKeyState(wcon.VK_SHIFT) < 0 or
-               win32api.GetKeyState(wcon.VK_MENU) < 0):
-            time.sleep(0.005)
-        if (button == "left"):
-            win32gui.PostMessage(window.id, wcon.WM_LBUTTONDOWN,
-                                 wcon.MK_LBUTTON, lParam)
-            win32gui.PostMessage(window.id, wcon.WM_LBUTTONUP,
-                                 wcon.MK_LBUTTON, lParam)
-        else:
-            win32gui.PostMessage(window.id, wcon.WM_RBUTTONDOWN,
-                                 wcon.MK_RBUTTON, lParam)
-            win32gui.PostMessage(window.id, wcon.WM_RBUTTONUP,
-                                 wcon.MK_RBUTTON, lParam)
-        # Sleep lower than 0.1 might cause issues when clicking in succession
-        if fast:
-            time.sleep(userset.FAST_SLEEP)
-        else:
-            time.sleep(userset.MEDIUM_SLEEP)
+    """This class handles inputs.
+
+    Captures of the window are shared between all instances and reused for
+    FRAME_TTL seconds, or until an input is sent to the window.
+    """
+
+    # Settings files from before FRAME_TTL was added don't have it
+    FRAME_TTL = getattr(userset, "FRAME_TTL", 0.005)
+
+    frame = None
+    frame_time = 0
+    frame_hits = 0
+    frame_misses = 0
+    # Capture backend, a GdiCapture of the game window unless set.
+    capture = None
+    # Background capture thread, see start_grabber()
+    grabber = None
+    # perf_counter() of the last input sent to the window
+    input_time = 0
+    # OcrEngine used by ocr(), see get_ocr_engine()
+    ocr_engine = None
+    # Glyph recognizer used by ocr_number()
+    digits = None
+    # Worker processes used by ocr_async(), see start_ocr_pool()
+    ocr_pool = None
+    # Sends the inputs, see queue_inputs() and start_input_queue()
+    input_queue = None
+    # Tracks the modifier keys the user holds, see get_modifiers()
+    modifiers = None
+    # Seconds wait_until() saved over the timeouts it waited for, and the
+    # number of waits that ran into their timeout
+    wait_saved = 0
+    wait_timeouts = 0
 
+    def click(self, x, y, button="left", fast=False, action=None):
+        """Click at pixel xy.
+
+        Keyword arguments:
+        action -- the Timing delay to keep after the click, for clicks that
+                  switch pages or open dialogs. (default None, a click)
+        """
+        self.queue_inputs([self.click_command(x, y, button, fast,
+                                              action)]).result()
 
     def send_string(self, string):
         """Send one or multiple characters to the window."""
         if type(string) == float:  # Remove decimal
             string = str(int(string))
-        for c in str(string):
-            while (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
-                   win32api.GetKeyState(wcon.VK_SHIFT) < 0 or
-                   win32api.GetKeyState(wcon.VK_MENU) < 0):
-                time.sleep(0.005)
-            if c.isdigit():  # Digits only require KEY_UP event.
-                win32gui.PostMessage(window.id, wcon.WM_KEYUP, ord(c.upper()),
-                                     0)
-                # time.sleep(0.03)  # This can probably be removed
-                continue
-            win32gui.PostMessage(window.id, wcon.WM_KEYDOWN, ord(c.upper()), 0)
-            time.sleep(userset.SHORT_SLEEP)  # This can probably be removed
-            win32gui.PostMessage(window.id, wcon.WM_KEYUP, ord(c.upper()), 0)
-        time.sleep(userset.SHORT_SLEEP)
+        self.queue_inputs([self.key_command(str(string))]).result()
+
+    def click_command(self, x, y, button="left", fast=False, action=None):
+        """Return the InputQueue command that clicks at pixel xy."""
+        # The delays are calibrated per machine, see Timing. The click
+        # delays only cover the first visible change, a page that has to be
+        # drawn before the next click needs the submenu delay.
+        gap = Timing.delay(action or ("fast_click" if fast else "click"))
+        return InputQueue.click(x + window.x, y + window.y, button, gap)
+
+    def key_command(self, text):
+        """Return the InputQueue command that types text."""
+        return InputQueue.keys(text, Timing.delay("key"))
+
+    def queue_inputs(self, commands):
+        """Send a batch of commands, returns a Future of its completion.
+
+        Build the commands with click_command() and key_command(). With a
+        running input queue the batch is sent by its thread, so the caller
+        can go on until it needs the inputs to have arrived. Otherwise the
+        batch is sent before returning.
+        """
+        return self.get_input_queue().submit(commands)
+
+    def click_many(self, points, button="left", fast=False):
+        """Click at every xy in points, returns a Future like queue_inputs().
+        """
+        return self.queue_inputs([self.click_command(x, y, button, fast)
+                                  for x, y in points])
+
+    def get_input_queue(self):
+        """Return the input queue, creating one if unset."""
+        if not Inputs.input_queue:
+            Inputs.input_queue = InputQueue(self.post_message,
+                                            self.get_modifiers().wait,
+                                            self.invalidate_frame)
+        return Inputs.input_queue
+
+    def start_input_queue(self):
+        """Send inputs from a background thread, see queue_inputs()."""
+        self.stop_input_queue()
+        Inputs.input_queue = self.get_input_queue()
+        Inputs.input_queue.start()
+
+    def stop_input_queue(self):
+        """Stop the input thread after the queued inputs, if it is running."""
+        if Inputs.input_queue and Inputs.input_queue.is_alive():
+            Inputs.input_queue.stop()
+        Inputs.input_queue = None
+
+    @staticmethod
+    def post_message(message, wParam, lParam):
+        """Post a message to the game window."""
+        win32gui.PostMessage(window.id, message, wParam, lParam)
+
+    def get_modifiers(self):
+        """Return the modifier key monitor, starting one if unset.
+
+        Inputs wait while the user holds Ctrl, Shift or Alt, so someone
+        typing doesn't change what the bot's keys and clicks do.
+        """
+        if not Inputs.modifiers:
+            Inputs.modifiers = Modifiers()
+            Inputs.modifiers.start()
+        return Inputs.modifiers
+
+    def send_number(self, value, scientific=True, digits=None, verify=None):
+        """Type a number into the focused input box in one burst.
+
+        The shortest text for the number is typed, see NumberKeys.encode().
+        Modifier keys are checked once before typing instead of before every
+        digit. Returns False if verify is set and the box doesn't show the
+        number afterwards, otherwise True.
+
+        Keyword arguments:
+        scientific -- the box accepts notation like 6e8. (default True)
+        digits -- round value down to this many significant digits.
+                  (default None)
+        verify -- name of the box in ncon.OCR_REGIONS to read the number
+                  back from. (default None)
+        """
+        text = NumberKeys.encode(value, scientific, digits)
+        self.queue_inputs([self.key_command(text)]).result()
+        if not verify:
+            return True
+        shown, _ = NumberReader.parse(self.ocr_region(verify))
+        if shown != NumberReader.parse(text)[0]:
+            print(f"Typed {text} but the box shows {shown}")
+            Timing.failed("key")
+            return False
+        return True
+
+    def get_frame(self):
+        """Get and return a Frame of the window.
+
+        The frame is taken from the frame cache if it is still fresh. It views
+        the capture buffer, so it is only valid until the next capture.
+        """
+        if Inputs.grabber:
+            return self.grabber_frame()
+        frame = self.cached_frame()
+        if frame is not None:
+            Inputs.frame_hits += 1
+            return frame
+        Inputs.frame_misses += 1
+        start = time.perf_counter()
+        frame = self.get_capture().grab()
+        Inputs.frame_time = start
+        Inputs.frame = frame
+        return frame
+
+    def cached_frame(self):
+        """Return the cached frame if it is still fresh, otherwise None.
+
+        The input queue drops the cache from its own thread, so the frame is
+        read once and checked to have been captured after the last input.
+        """
+        frame, frame_time = Inputs.frame, Inputs.frame_time
+        if (frame is None or frame_time < Inputs.input_time or
+           time.perf_counter() - frame_time >= Inputs.FRAME_TTL):
+            return None
+        return frame
+
+    def get_region(self, x_start, y_start, x_end, y_end):
+        """Get and return an RGB array of an area of the game.
+
+        Coordinates are relative to the game, like for click(). A fresh
+        cached frame is sliced, otherwise only the area is captured. The
+        array is a copy, so it stays valid after the next capture.
+        """
+        # Bitmaps are created with a 8px border
+        x_start += window.x + 8
+        x_end += window.x + 8
+        y_start += window.y + 8
+        y_end += window.y + 8
+        frame = None if Inputs.grabber else self.cached_frame()
+        if Inputs.grabber:
+            area = self.grabber_frame().rgb[y_start:y_end, x_start:x_end]
+        elif frame is not None:
+            Inputs.frame_hits += 1
+            area = frame.rgb[y_start:y_end, x_start:x_end]
+        else:
+            Inputs.frame_misses += 1
+            area = self.get_capture().grab_region(x_start, y_start,
+                                                  x_end, y_end)
+        return numpy.ascontiguousarray(area)
+
+    def get_capture(self):
+        """Return the capture backend, creating a GdiCapture if unset."""
+        if not Inputs.capture:
+            Inputs.capture = GdiCapture()
+        return Inputs.capture
 
     def get_bitmap(self):
-        """Get and return a bitmap of the window."""
-        left, top, right, bot = win32gui.GetWindowRect(window.id)
-        w = right - left
-        h = bot - top
-        hwnd_dc = win32gui.GetWindowDC(window.id)
-        mfc_dc = win32ui.CreateDCFromHandle(hwnd_dc)
-        save_dc = mfc_dc.CreateCompatibleDC()
-        save_bitmap = win32ui.CreateBitmap()
-        save_bitmap.CreateCompatibleBitmap(mfc_dc, w, h)
-        save_dc.SelectObject(save_bitmap)
-        windll.user32.PrintWindow(window.id, save_dc.GetSafeHdc(), 0)
-        bmpinfo = save_bitmap.GetInfo()
-        bmpstr = save_bitmap.GetBitmapBits(True)
-
-        # This creates an Image object from Pillow
-        bmp = image.frombuffer('RGB',
-                               (bmpinfo['bmWidth'],
-                                bmpinfo['bmHeight']),
-                               bmpstr, 'raw', 'BGRX', 0, 1)
-
-        win32gui.DeleteObject(save_bitmap.GetHandle())
-        save_dc.DeleteDC()
-        mfc_dc.DeleteDC()
-        win32gui.ReleaseDC(window.id, hwnd_dc)
-        # bmp.save("asdf.png")
-        return bmp
-
-    def pixel_search(self, color, x_start, y_start, x_end, y_end):
+        """Get and return a bitmap of the window.
+
+        The bitmap is taken from the frame cache if it is still fresh, do not
+        modify it in place.
+        """
+        return self.get_frame().image()
+
+    def invalidate_frame(self):
+        """Drop the cached frame, the next read will capture the window."""
+        Inputs.frame = None
+        Inputs.input_time = time.perf_counter()
+
+    def start_grabber(self, rate=60):
+        """Capture frames on a background thread instead of on demand.
+
+        Reads then use the newest frame that was captured after the last
+        input, so they don't have to wait for a capture.
+
+        Keyword arguments:
+        rate -- frames per second to capture. (default 60)
+        """
+        self.stop_grabber()
+        Inputs.grabber = Grabber(self.get_capture(), rate)
+        Inputs.grabber.start()
+
+    def stop_grabber(self):
+        """Stop the background capture thread, if it is running."""
+        if Inputs.grabber:
+            Inputs.grabber.stop()
+            Inputs.grabber = None
+
+    def grabber_frame(self):
+        """Return the newest frame of the grabber that shows the last input."""
+        frame, seq = Inputs.grabber.latest()
+        while frame is None or frame.timestamp < Inputs.input_time:
+            if not Inputs.grabber.is_alive():
+                raise RuntimeError("The capture thread has stopped")
+            frame, seq = Inputs.grabber.wait(seq, 0.5)
+        return frame
+
+    def wait_frame(self, timeout=0.01):
+        """Wait for the next frame of the grabber, or sleep for timeout."""
+        if Inputs.grabber:
+            Inputs.grabber.wait(Inputs.grabber.seq, timeout)
+        else:
+            time.sleep(timeout)
+
+    def wait_until(self, predicate, timeout, poll=0.01):
+        """Wait until predicate() is true, returns False on timeout.
+
+        Use this instead of sleeping for timeout, the wait ends as soon as
+        the game has reacted. See pixel_is(), area_changed() and
+        ocr_matches() for predicates.
+
+        Keyword arguments:
+        predicate -- function returning True once the wait is over.
+        timeout -- the longest time to wait, in seconds.
+        poll -- time between checks, in seconds. (default 0.01)
+        """
+        start = time.perf_counter()
+        while not predicate():
+            if time.perf_counter() - start >= timeout:
+                Inputs.wait_timeouts += 1
+                return False
+            self.wait_frame(poll)
+        Inputs.wait_saved += max(timeout - (time.perf_counter() - start), 0)
+        return True
+
+    def pixel_is(self, x, y, color):
+        """Return a predicate that is true while pixel xy has color."""
+        return lambda: self.get_pixel_color(x, y) == color
+
+    def area_changed(self, x_start, y_start, x_end, y_end, fraction=0.2):
+        """Return a predicate that is true once the area has changed.
+
+        The area is captured when the predicate is created, so create it
+        before the input it should see the effect of.
+
+        Keyword arguments:
+        fraction -- share of the pixels that have to differ, so counters
+                    ticking in the area don't count as a change.
+                    (default 0.2)
+        """
+        before = self.get_region(x_start, y_start, x_end, y_end)
+        needed = fraction * before.shape[0] * before.shape[1]
+
+        def changed():
+            after = self.get_region(x_start, y_start, x_end, y_end)
+            return numpy.count_nonzero((after != before).any(axis=2)) >= needed
+        return changed
+
+    def ocr_matches(self, name, pattern):
+        """Return a predicate that is true once a region's text matches.
+
+        Keyword arguments:
+        name -- the region in ncon.OCR_REGIONS.
+        pattern -- regular expression searched for in the text.
+        """
+        return lambda: re.search(pattern, self.ocr_region(name)) is not None
+
+    def reset_wait_stats(self):
+        """Reset the time saved and the timeouts of wait_until()."""
+        Inputs.wait_saved = 0
+        Inputs.wait_timeouts = 0
+
+    def reset_frame_stats(self):
+        """Reset the frame cache hit and miss counters."""
+        Inputs.frame_hits = 0
+        Inputs.frame_misses = 0
+
+    def pixel_search(self, color, x_start, y_start, x_end, y_end,
+                     tolerance=0):
         """Find the first pixel with the supplied color within area.
 
         Function searches per row, left to right. Returns the coordinates of
         first match or None, if nothing is found.
 
-        Color must be supplied in hex.
+        Color must be a Color or supplied in hex, a list of colors matches
+        any of them.
+
+        Keyword arguments:
+        tolerance -- allowed difference per color channel. (default 0)
         """
-        bmp = self.get_bitmap()
-        width, height = bmp.size
-        for y in range(y_start, y_end):
-            for x in range(x_start, x_end):
-                if y > height or x > width:
-                    continue
-                t = bmp.getpixel((x, y))
-                if (self.rgb_to_hex(t) == color):
-                    return x - 8, y - 8
+        area = self.get_frame().rgb[y_start:y_end, x_start:x_end]
+        match = PixelSearch.first(area, color, tolerance)
+        if match is None:
+            return None
+        # Bitmaps are created with a 8px border
+        return match[0] + x_start - 8, match[1] + y_start - 8
 
-        return None
+    def pixel_search_all(self, color, x_start, y_start, x_end, y_end,
+                         tolerance=0):
+        """Find all pixels with the supplied color within area.
 
-    def image_search(self, x_start, y_start, x_end, y_end, image):
+        Returns a list of coordinates, ordered per row, left to right.
+        """
+        area = self.get_frame().rgb[y_start:y_end, x_start:x_end]
+        return [(x + x_start - 8, y + y_start - 8) for x, y in
+                PixelSearch.all(area, color, tolerance)]
+
+    def image_search(self, x_start, y_start, x_end, y_end, image,
+                     threshold=None):
         """Search the screen for the supplied picture.
 
-        Returns a tuple with x,y-coordinates.
+        Returns a tuple with x,y-coordinates of the best match within the
+        area, or None if its score is below threshold.
 
         Keyword arguments:
-        image -- Filename or path to file that you search for.
+        image -- Filename or path to file that you search for, or a list of
+                 them to search for several pictures at once.
+        threshold -- minimum normalized score between -1 and 1 of a match.
+                     None returns the best match no matter the score.
+                     (default None)
         """
-        bmp = self.get_bitmap()
-        # Bitmaps are created with a 8px border
-        search_area = bmp.crop((x_start + 8, y_start + 8,
-                                x_end + 8, y_end + 8))
-        search_area = numpy.asarray(search_area)
-        search_area = cv2.cvtColor(search_area, cv2.COLOR_BGR2GRAY)
-        template = cv2.imread(image, 0)
-        res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF)
-        *_, t = cv2.minMaxLoc(res)
-        return t
-
-    def ocr(self, x_start, y_start, x_end, y_end, debug=False, bmp=None):
+        # Coordinates are relative to the window, not the game
+        search_area = self.get_region(x_start - window.x, y_start - window.y,
+                                      x_end - window.x, y_end - window.y)
+        search_area = cv2.cvtColor(search_area, cv2.COLOR_RGB2GRAY)
+        match = Templates.match(search_area, image, threshold)
+        if match is None:
+            return None
+        return match[0], match[1]
+
+    def ocr(self, x_start, y_start, x_end, y_end, debug=False, bmp=None,
+            name=None, profile=None):
         """Perform an OCR of the supplied area, returns a string of the result.
 
         Keyword arguments:
@@ -143,39 +404,245 @@ class Inputs():
                performing multiple different OCR-readings in succession from
                the same page. This is to avoid to needlessly get the same
                bitmap multiple times. If a bitmap is not passed, the function
-               will get the bitmap itself. (default None)
+               captures only the area it reads. (default None)
+        name -- name of the region. If set and the area didn't change since
+                the last read of this name, the last result is returned
+                without running the OCR. (default None)
+        profile -- name of the OcrProfile to read the area with, None uses
+                   the default one. (default None)
         """
+        area = self.get_area(x_start, y_start, x_end, y_end, bmp)
+        if name:
+            return Regions.read(name, area,
+                                lambda a: self.read_text(a, debug, profile))
+        return self.read_text(area, debug, profile)
+
+    def ocr_number(self, x_start, y_start, x_end, y_end, bmp=None,
+                   name=None, profile=None):
+        """Read a number in the game's font, returns a string like ocr().
+
+        The number is read by the glyph recognizer, and by ocr() if the
+        recognizer isn't confident. Takes the same arguments as ocr().
+        """
+        area = self.get_area(x_start, y_start, x_end, y_end, bmp)
+        if name:
+            return Regions.read(name, area,
+                                lambda a: self.read_number(a, profile))
+        return self.read_number(area, profile)
+
+    def ocr_region(self, name, bmp=None):
+        """Read a region of ncon.OCR_REGIONS with its profile.
+
+        Regions with a number profile are read like ocr_number(), the others
+        like ocr().
+
+        Keyword arguments:
+        bmp -- a bitmap from the get_bitmap() function. (default None)
+        """
+        *area, profile = ncon.OCR_REGIONS[name]
+        if OcrProfile.get(profile).whitelist:
+            return self.ocr_number(*area, bmp=bmp, name=name, profile=profile)
+        return self.ocr(*area, bmp=bmp, name=name, profile=profile)
+
+    def ocr_many(self, regions, bmp=None, numbers=False):
+        """Read several areas of one screen, returns a dict of the results.
+
+        Areas that aren't cached are prepared like in ocr(), stitched into
+        one image and read with a single OCR call per profile.
+
+        Keyword arguments:
+
+        regions -- dictionary of key: (x_start, y_start, x_end, y_end) or
+                   key: (x_start, y_start, x_end, y_end, profile), where
+                   profile is the name of an OcrProfile. The results are
+                   returned under the same keys.
+        bmp -- a bitmap from the get_bitmap() function. If it is not passed,
+               the areas are sliced from one frame. (default None)
+        numbers -- read the areas with the glyph recognizer first, like
+                   ocr_number(). (default False)
+        """
+        rgb = self.get_frame().rgb if bmp is None else None
+        results = {}
+        groups = {}
+        for key, (x_start, y_start, x_end, y_end, *profile) in regions.items():
+            profile = OcrProfile.get(profile[0] if profile else None)
+            if rgb is None:
+                area = self.get_area(x_start, y_start, x_end, y_end, bmp)
+            else:
+                # Bitmaps are created with a 8px border
+                x_start += window.x + 8
+                x_end += window.x + 8
+                y_start += window.y + 8
+                y_end += window.y + 8
+                area = numpy.ascontiguousarray(rgb[y_start:y_end,
+                                                   x_start:x_end])
+            if numbers:
+                text, confidence = self.get_digits().read(area)
+                if confidence >= Digits.THRESHOLD:
+                    results[key] = text
+                    continue
+            text = OcrCache.get(area, profile.name)
+            if text is not None:
+                results[key] = text
+                continue
+            groups.setdefault(profile, []).append((key, area))
+        for profile, group in groups.items():
+            texts = self.get_ocr_engine().read_many(
+                [profile.prepare(area) for _, area in group], profile.config)
+            for (key, area), text in zip(group, texts):
+                OcrCache.put(area, text, profile.name)
+                results[key] = text
+        return results
+
+    def ocr_async(self, x_start, y_start, x_end, y_end, number=False,
+                  profile=None):
+        """Start reading an area, returns a Future of the string.
+
+        The area is read from the current frame by the OCR pool, so inputs
+        can be sent while the OCR runs. Reads answered by the OCR cache or
+        the glyph recognizer are done at once. Without a running pool the
+        area is read before returning.
+
+        Keyword arguments:
+        number -- read a number like ocr_number(). (default False)
+        profile -- name of the OcrProfile to read with. (default None)
+        """
+        frame = self.get_frame()
+        # Bitmaps are created with a 8px border
+        box = (x_start + window.x + 8, y_start + window.y + 8,
+               x_end + window.x + 8, y_end + window.y + 8)
+        area = numpy.ascontiguousarray(frame.rgb[box[1]:box[3],
+                                                 box[0]:box[2]])
+        future = Future()
+        if number:
+            text, confidence = self.get_digits().read(area)
+            if confidence >= Digits.THRESHOLD:
+                future.set_result(text)
+                return future
+        text = OcrCache.get(area, OcrProfile.get(profile).name)
+        if text is not None:
+            future.set_result(text)
+        elif Inputs.ocr_pool:
+            future = Inputs.ocr_pool.read(frame, box, profile)
+        else:
+            future.set_result(self.read_text(area, profile=profile))
+        return future
+
+    def ocr_region_async(self, name):
+        """Start reading a region of ncon.OCR_REGIONS, returns a Future.
+
+        Like ocr_region(), but the region is read by ocr_async().
+        """
+        *area, profile = ncon.OCR_REGIONS[name]
+        return self.ocr_async(*area, profile=profile,
+                              number=bool(OcrProfile.get(profile).whitelist))
+
+    def archive_region(self, name, text):
+        """Archive the last crop of a region of ncon.OCR_REGIONS.
+
+        Call this when the text read from it was wrong or doubtful. The crop
+        is saved in the background by SampleArchive.
+
+        Keyword arguments:
+        name -- the region, it must have been read with ocr_region().
+        text -- what the OCR read.
+        """
+        area = Regions.areas.get(name)
+        if area is not None:
+            SampleArchive.add(name, area, text, ncon.OCR_REGIONS[name][-1])
+
+    def start_ocr_pool(self, workers=None):
+        """Start the worker processes that ocr_async() reads with.
+
+        Keyword arguments:
+        workers -- number of processes, None leaves one CPU for the bot.
+                   (default None)
+        """
+        self.stop_ocr_pool()
+        Inputs.ocr_pool = OcrPool(workers)
+
+    def stop_ocr_pool(self):
+        """Stop the OCR worker processes, if they are running."""
+        if Inputs.ocr_pool:
+            Inputs.ocr_pool.close()
+            Inputs.ocr_pool = None
+
+    def read_number(self, area, profile=None):
+        """Read a number from an RGB array, falling back to the OCR."""
+        text, confidence = self.get_digits().read(area)
+        if confidence >= Digits.THRESHOLD:
+            return text
+        return self.read_text(area, profile=profile)
+
+    def get_digits(self):
+        """Return the glyph recognizer, loading its atlas if unset."""
+        if not Inputs.digits:
+            Inputs.digits = Digits()
+        return Inputs.digits
+
+    def get_area(self, x_start, y_start, x_end, y_end, bmp=None):
+        """Return an RGB array of an area, from bmp if it is supplied."""
+        if bmp is None:
+            return self.get_region(x_start, y_start, x_end, y_end)
         x_start += window.x
         x_end += window.x
         y_start += window.y
         y_end += window.y
-
-        if not bmp:
-            bmp = self.get_bitmap()
         # Bitmaps are created with a 8px border
-        bmp = bmp.crop((x_start + 8, y_start + 8, x_end + 8, y_end + 8))
-        *_, right, lower = bmp.getbbox()
-        bmp = bmp.resize((right*3, lower*3), image.BICUBIC)  # Resize image
-        bmp = bmp.filter(ImageFilter.SHARPEN)  # Sharpen image for better OCR
+        return numpy.asarray(bmp.crop((x_start + 8, y_start + 8,
+                                       x_end + 8, y_end + 8)))
+
+    def read_text(self, area, debug=False, profile=None):
+        """Run the OCR on an RGB array, returns a string of the result.
+
+        Results are cached by the pixels that were read and the profile,
+        unless debug is set.
+        """
+        if debug:
+            return self.run_ocr(area, debug, profile)
+        return OcrCache.read(area, lambda a: self.run_ocr(a, profile=profile),
+                             OcrProfile.get(profile).name)
+
+    def run_ocr(self, area, debug=False, profile=None):
+        """Run the OCR on an RGB array, bypassing the cache."""
+        profile = OcrProfile.get(profile)
+        bmp = profile.prepare(area)
         if debug:
             bmp.save("debug_ocr.png")
-        s = pytesseract.image_to_string(bmp)
-        return s
+        return self.get_ocr_engine().read(bmp, profile.config)
+
+    def get_ocr_engine(self):
+        """Return the OCR engine, the fastest installed one if unset."""
+        if not Inputs.ocr_engine:
+            Inputs.ocr_engine = OcrEngine.default()
+        return Inputs.ocr_engine
+
+    def region_changed(self, name, x_start, y_start, x_end, y_end):
+        """Return True if the area changed since it was last seen as name."""
+        area = self.get_region(x_start, y_start, x_end, y_end)
+        return Regions.changed(name, area)
 
     def get_pixel_color(self, x, y):
-        """Get the color of selected pixel in HEX."""
-        dc = win32gui.GetWindowDC(window.id)
-        rgba = win32gui.GetPixel(dc, x + 8 + window.x, y + 8 + window.y)
-        win32gui.ReleaseDC(window.id, dc)
-        r = rgba & 0xff
-        g = rgba >> 8 & 0xff
-        b = rgba >> 16 & 0xff
-        return self.rgb_to_hex((r, g, b))
+        """Get the Color of selected pixel."""
+        return self.get_pixel_colors([(x, y)])[0]
+
+    def get_pixel_colors(self, points):
+        """Get the Colors of several pixels from a single capture.
+
+        Keyword arguments:
+        points -- list of x, y tuples, relative to the game like click().
+        """
+        if not points:
+            return []
+        xs, ys = numpy.array(points).T
+        # Bitmaps are created with a 8px border
+        rgb = self.get_frame().rgb[ys + window.y + 8, xs + window.x + 8]
+        return [Color(c) for c in PixelSearch.pack(rgb).tolist()]
 
     def remove_letters(self, s):
         """Remove all non digit characters from string."""
         return re.sub('[^0-9]', '', s)
 
     def rgb_to_hex(self, tup):
-        """Convert RGB value to HEX."""
+        """Convert RGB value to HEX, for display."""
         return '%02x%02x%02x'.upper() % (tup[0], tup[1], tup[2])
@@ -0,0 +1,152 @@
+"""Track the modifier keys the user holds, so inputs can wait for them."""
+from ctypes import wintypes
+import ctypes
+import threading
+import time
+import win32api
+import win32con as wcon
+
+user32 = ctypes.WinDLL("user32", use_last_error=True)
+kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+LRESULT = ctypes.c_ssize_t
+HOOKPROC = ctypes.WINFUNCTYPE(LRESULT, ctypes.c_int, wintypes.WPARAM,
+                              wintypes.LPARAM)
+user32.SetWindowsHookExW.argtypes = (ctypes.c_int, HOOKPROC,
+                                     wintypes.HINSTANCE, wintypes.DWORD)
+user32.SetWindowsHookExW.restype = wintypes.HHOOK
+user32.CallNextHookEx.argtypes = (wintypes.HHOOK, ctypes.c_int,
+                                  wintypes.WPARAM, wintypes.LPARAM)
+user32.CallNextHookEx.restype = LRESULT
+user32.UnhookWindowsHookEx.argtypes = (wintypes.HHOOK,)
+kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+
+class KBDLLHOOKSTRUCT(ctypes.Structure):
+    """The key event a low level keyboard hook receives."""
+
+    _fields_ = [("vkCode", wintypes.DWORD),
+                ("scanCode", wintypes.DWORD),
+                ("flags", wintypes.DWORD),
+                ("time", wintypes.DWORD),
+                ("dwExtraInfo", ctypes.c_size_t)]
+
+
+class Modifiers(threading.Thread):
+    """Know whether Ctrl, Shift or Alt is held without asking Windows.
+
+    A low level keyboard hook on this thread sees every key the user
+    presses and keeps the free event set while no modifier is held. wait()
+    then only checks the event. The bot's own inputs are posted to the
+    game window and never reach the hook.
+
+    If the hook can't be installed, wait() polls GetKeyState() like before.
+    """
+
+    KEYS = (wcon.VK_LSHIFT, wcon.VK_RSHIFT, wcon.VK_LCONTROL,
+            wcon.VK_RCONTROL, wcon.VK_LMENU, wcon.VK_RMENU)
+    # Seconds between checks with GetKeyState() while blocked
+    POLL = 0.005
+    # Seconds a held key is trusted before GetKeyState() is asked, in case
+    # Windows dropped the hook and missed the key going up
+    RECHECK = 0.5
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.held = set()
+        self.free = threading.Event()
+        self.free.set()
+        self.hooked = False
+        self.ready = threading.Event()
+        self.thread_id = None
+        # Kept referenced, Windows calls it for as long as the hook exists
+        self.callback = HOOKPROC(self.hook)
+        # Seconds inputs waited for modifiers, and how often they had to
+        self.blocked_time = 0
+        self.blocks = 0
+
+    def start(self):
+        """Install the hook, returns once it is known if that worked."""
+        for key in Modifiers.KEYS:
+            if win32api.GetAsyncKeyState(key) < 0:
+                self.held.add(key)
+        self.update()
+        super().start()
+        self.ready.wait(1)
+
+    def stop(self):
+        """Remove the hook and wait for the thread to finish."""
+        if self.is_alive():
+            user32.PostThreadMessageW(self.thread_id, wcon.WM_QUIT, 0, 0)
+            self.join()
+
+    def run(self):
+        """Install the hook and pump messages so it gets called."""
+        self.thread_id = kernel32.GetCurrentThreadId()
+        handle = user32.SetWindowsHookExW(wcon.WH_KEYBOARD_LL, self.callback,
+                                          kernel32.GetModuleHandleW(None), 0)
+        if not handle:
+            print("Couldn't hook the keyboard, polling the modifier keys")
+            self.ready.set()
+            return
+        self.hooked = True
+        self.ready.set()
+        message = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(message), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(message))
+            user32.DispatchMessageW(ctypes.byref(message))
+        user32.UnhookWindowsHookEx(handle)
+        self.hooked = False
+        self.held.clear()
+        self.update()
+
+    def hook(self, code, wParam, lParam):
+        """Record modifier presses, called by Windows on every key event."""
+        if code == wcon.HC_ACTION:
+            key = ctypes.cast(lParam,
+                              ctypes.POINTER(KBDLLHOOKSTRUCT)).contents.vkCode
+            if key in Modifiers.KEYS:
+                if wParam in (wcon.WM_KEYDOWN, wcon.WM_SYSKEYDOWN):
+                    self.held.add(key)
+                else:
+                    self.held.discard(key)
+                self.update()
+        return user32.CallNextHookEx(None, code, wParam, lParam)
+
+    def update(self):
+        """Set the free event to whether no modifier is held."""
+        if self.held:
+            self.free.clear()
+        else:
+            self.free.set()
+
+    @staticmethod
+    def pressed():
+        """Return True if Windows reports Ctrl, Shift or Alt as held."""
+        return (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
+                win32api.GetKeyState(wcon.VK_SHIFT) < 0 or
+                win32api.GetKeyState(wcon.VK_MENU) < 0)
+
+    def wait(self):
+        """Return once the user holds no modifier key."""
+        if self.hooked:
+            if self.free.is_set():
+                return
+            start = time.perf_counter()
+            while not self.free.wait(Modifiers.RECHECK):
+                if not Modifiers.pressed():
+                    self.held.clear()
+                    self.update()
+        else:
+            if not Modifiers.pressed():
+                return
+            start = time.perf_counter()
+            while Modifiers.pressed():
+                time.sleep(Modifiers.POLL)
+        self.blocked_time += time.perf_counter() - start
+        self.blocks += 1
+
+    def reset_stats(self):
+        """Reset the time and count of blocked inputs."""
+        self.blocked_time = 0
+        self.blocks = 0
@@ -1,5 +1,7 @@
 """Navigation class handles navigation through the menus."""
 from classes.inputs import Inputs
+from classes.screens import Screens
+from classes.timing import Timing
 import ngucon as ncon
 import usersettings as userset
 import time
@@ -14,26 +16,181 @@ class Navigation(Inputs):
 
     def menu(self, target):
         """Navigate through main menu."""
-        if Navigation.current_menu == target:
+        if self.at(target):
             return
         y = ncon.MENUOFFSETY + ((self.menus.index(target) + 1) *
                                 ncon.MENUDISTANCEY)
-        self.click(ncon.MENUOFFSETX, y)
-        time.sleep(userset.LONG_SLEEP)
-        Navigation.current_menu = target
+        self.go(target, ncon.MENUOFFSETX, y, "menu")
+
+    def at(self, target):
+        """Return True if the game shows target.
+
+        With learned Screens the screen is classified and current_menu set
+        to it, so it can't go stale. Otherwise current_menu is trusted.
+        """
+        if Screens.ready():
+            colors = self.get_pixel_colors(Screens.probes)
+            Navigation.current_menu = Screens.classify(colors) or ""
+        return Navigation.current_menu == target
+
+    def go(self, target, x, y, action="submenu", retries=1):
+        """Click the button of a screen and make sure it shows.
+
+        Returns False if the game shows another screen after the retries.
+        Without learned Screens the click is assumed to have worked.
+
+        Keyword arguments:
+        target -- name of the screen the button leads to.
+        action -- "menu" or "submenu", see Timing. (default "submenu")
+        retries -- times to click again if target doesn't show.
+                   (default 1)
+        """
+        for _ in range(retries + 1):
+            self.open_menu(x, y, action)
+            if not Screens.ready():
+                Navigation.current_menu = target
+                return True
+            if self.wait_until(lambda: self.at(target), Timing.delay(action)):
+                return True
+            Timing.failed(action)  # The game shows another screen
+        print(f"Clicked {target}, but the game shows "
+              f"{Navigation.current_menu or 'an unknown screen'}")
+        return False
+
+    def open_menu(self, x, y, action="submenu"):
+        """Click a menu button and wait until the menu shows.
+
+        A menu has arrived when most of the content area changed. If it
+        doesn't within the delay of action, the click is assumed to have
+        worked like with a fixed sleep. The menu may have been showing
+        already, so this isn't taken as a lost click, see go().
+
+        Keyword arguments:
+        action -- "menu" or "submenu", see Timing. (default "submenu")
+        """
+        arrived = self.area_changed(ncon.CONTENTX1, ncon.CONTENTY1,
+                                    ncon.CONTENTX2, ncon.CONTENTY2)
+        self.click(x, y)
+        self.wait_until(arrived, Timing.delay(action))
+
+    def calibrate_timing(self, rounds=10):
+        """Measure how fast the game reacts to inputs and save the delays.
+
+        Switches between two menus, timing the first visible change after
+        the click and the time until the menu has been drawn, then types
+        numbers into the input box. See Timing for how the delays follow.
+
+        Keyword arguments:
+        rounds -- number of measurements per kind of input. (default 10)
+        """
+        def reaction(predicate, timeout=1):
+            while not predicate():
+                if time.perf_counter() - Inputs.input_time >= timeout:
+                    return None
+                time.sleep(0.002)
+            return time.perf_counter() - Inputs.input_time
+
+        print(f"Calibrating input delays: typing {rounds} numbers into the "
+              f"augmentations input box and switching between fight and "
+              f"inventory {rounds} times")
+        content = (ncon.CONTENTX1, ncon.CONTENTY1,
+                   ncon.CONTENTX2, ncon.CONTENTY2)
+        samples = {"click": [], "menu": [], "key": []}
+        box = ncon.OCR_REGIONS["input_box"][:4]
+        self.menu("augmentations")
+        Timing.delays = {action: 0 for action in Timing.DEFAULTS}
+        try:
+            for i in range(rounds):
+                self.input_box()
+                time.sleep(userset.SHORT_SLEEP)
+                typed = self.area_changed(*box, fraction=0.01)
+                self.send_number(10 ** (i % 3 + 1) + i, False)
+                elapsed = reaction(typed)
+                if elapsed is not None:
+                    samples["key"].append(elapsed)
+            for i in range(rounds * 2):
+                target = ["fight", "inventory"][i % 2]
+                first = self.area_changed(*content, fraction=0.01)
+                drawn = self.area_changed(*content)
+                y = ncon.MENUOFFSETY + ((self.menus.index(target) + 1) *
+                                        ncon.MENUDISTANCEY)
+                self.click(ncon.MENUOFFSETX, y)
+                for action, predicate in (("click", first), ("menu", drawn)):
+                    elapsed = reaction(predicate)
+                    if elapsed is not None:
+                        samples[action].append(elapsed)
+                Navigation.current_menu = target
+        finally:
+            Timing.delays = None
+        samples["fast_click"] = samples["click"]
+        samples["submenu"] = samples["menu"]
+        Timing.derive(samples)
+        print("Calibrated delays:", ", ".join(
+            f"{action} {delay * 1000:.0f} ms"
+            for action, delay in Timing.delays.items()))
+
+    def calibrate_screens(self):
+        """Visit every screen and learn how to tell them apart.
+
+        Each screen is captured twice, a second apart, so the pixels that
+        change on their own aren't used as probes. See Screens.
+        """
+        visits = [(name, lambda name=name: self.menu(name))
+                  for name in self.menus]
+        visits += [("ngu_magic", self.ngu_magic), ("spells", self.spells),
+                   ("perks", self.perks), ("exp", self.exp),
+                   ("exp_magic", self.exp_magic), ("info", self.info),
+                   ("misc", self.misc), ("rebirth", self.rebirth)]
+        print(f"Learning screens: opening {len(visits)} menus and submenus, "
+              f"this takes about {len(visits) * 1.5:.0f} seconds")
+        Screens.reset()
+        captures = {}
+        for name, visit in visits:
+            Navigation.current_menu = ""
+            visit()
+            time.sleep(userset.LONG_SLEEP)
+            first = self.get_region(*Screens.AREA)
+            time.sleep(1)
+            captures[name] = [first, self.get_region(*Screens.AREA)]
+        weak = Screens.learn(captures)
+        print(f"Learned {len(Screens.names)} screens from "
+              f"{len(Screens.probes)} probe pixels")
+        for a, b in weak:
+            print(f"Screens {a} and {b} are hard to tell apart")
+        self.menu("inventory")
 
     def input_box(self):
         """Click input box."""
         self.click(ncon.NUMBERINPUTBOXX, ncon.NUMBERINPUTBOXY)
         time.sleep(userset.SHORT_SLEEP)
 
+    def input_number(self, value, digits=None, retries=1):
+        """Type a number into the input box.
+
+        With ncon.INPUT_VERIFY the box is read back and the number typed
+        again if it didn't arrive. Clicking the box selects its text, so a
+        failed number is typed over on retries.
+
+        Keyword arguments:
+        value -- the number to type.
+        digits -- round value down to this many significant digits.
+                  (default None)
+        retries -- times to type the number again if the box doesn't show
+                   it. (default 1)
+        """
+        verify = "input_box" if ncon.INPUT_VERIFY else None
+        for _ in range(retries + 1):
+            self.input_box()
+            if self.send_number(value, ncon.INPUT_SCIENTIFIC, digits,
+                                verify):
+                return True
+        return False
+
     def rebirth(self):
         """Click rebirth menu."""
-        if Navigation.current_menu == "rebirth":
+        if self.at("rebirth"):
             return
-        self.click(ncon.REBIRTHX, ncon.REBIRTHY)
-        time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "rebirth"
+        self.go("rebirth", ncon.REBIRTHX, ncon.REBIRTHY)
 
     def confirm(self):
         """Click yes in confirm window."""
@@ -42,61 +199,55 @@ class Navigation(Inputs):
 
     def ngu_magic(self):
         """Navigate to NGU magic."""
-        if Navigation.current_menu == "ngu_magic":
+        if self.at("ngu_magic"):
             return
         self.menu("ngu")
-        self.click(ncon.NGUMAGICX, ncon.NGUMAGICY)
-        time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "ngu_magic"
+        self.go("ngu_magic", ncon.NGUMAGICX, ncon.NGUMAGICY)
 
     def exp(self):
         """Navigate to EXP Menu."""
-        if Navigation.current_menu == "exp":
+        if self.at("exp"):
             return
-        self.click(ncon.EXPX, ncon.EXPY)
-        time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "exp"
+        self.go("exp", ncon.EXPX, ncon.EXPY)
 
     def exp_magic(self):
         """Navigate to the magic menu within the EXP menu."""
-        if Navigation.current_menu == "exp_magic":
+        if self.at("exp_magic"):
             return
         self.exp()
-        self.click(ncon.MMENUX, ncon.MMENUY)
-        time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "exp_magic"
+        self.go("exp_magic", ncon.MMENUX, ncon.MMENUY)
 
     def info(self):
         """Click info 'n stuff."""
-        if Navigation.current_menu == "info":
+        if self.at("info"):
             return
-        self.click(ncon.INFOX, ncon.INFOY)
-        time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "info"
+        self.go("info", ncon.INFOX, ncon.INFOY)
 
     def misc(self):
         """Navigate to Misc stats."""
-        if Navigation.current_menu == "misc":
+        if self.at("misc"):
             return
         self.info()
-        self.click(ncon.MISCX, ncon.MISCY)
-        time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "misc"
+        self.go("misc", ncon.MISCX, ncon.MISCY)
 
     def perks(self):
         """Navigate to Perks screen."""
-        if Navigation.current_menu == "perks":
+        if self.at("perks"):
             return
         self.menu("adventure")
+        # The perks cover too little of the screen for open_menu()
         self.click(ncon.ITOPODX + ncon.ITOPODPERKSOFFSETX, ncon.ITOPODY)
-        Navigation.current_menu = "perks"
+        if not Screens.ready():
+            Navigation.current_menu = "perks"
+        elif not self.wait_until(lambda: self.at("perks"),
+                                 Timing.delay("submenu")):
+            print("Clicked perks, but the game shows "
+                  f"{Navigation.current_menu or 'an unknown screen'}")
 
     def spells(self):
         """Navigate to the spells menu within the magic menu."""
-        if Navigation.current_menu == "spells":
+        if self.at("spells"):
             return
         self.menu("bloodmagic")
-        self.click(ncon.BMSPELLX, ncon.BMSPELLY)
-        time.sleep(userset.SHORT_SLEEP)
-        Navigation.current_menu = "spells"
+        self.go("spells", ncon.BMSPELLX, ncon.BMSPELLY)
 
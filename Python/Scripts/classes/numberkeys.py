@@ -0,0 +1,55 @@
+"""Turn numbers into the keystrokes that type them into an input box."""
+import win32con as wcon
+
+
+class NumberKeys():
+    """Encode numbers as short strings and window messages."""
+
+    # win32con has no constant for the period key
+    VK_OEM_PERIOD = 0xBE
+
+    @staticmethod
+    def cost(text):
+        """Return the number of messages needed to type text."""
+        # Digits only require KEY_UP event, the rest KEY_DOWN and KEY_UP.
+        return sum(1 if c.isdigit() else 2 for c in text)
+
+    @staticmethod
+    def encode(value, scientific=True, digits=None):
+        """Return the text that types value with the fewest messages.
+
+        Keyword arguments:
+        value -- the number, decimals are dropped.
+        scientific -- the box accepts notation like 6e8. (default True)
+        digits -- round value down to this many significant digits, for
+                  boxes where a little less is fine. (default None)
+        """
+        value = int(value)
+        text = str(value)
+        if digits and value > 0 and len(text) > digits:
+            scale = 10 ** (len(text) - digits)
+            value = value // scale * scale
+            text = str(value)
+        if not scientific or value <= 0:
+            return text
+        mantissa = text.rstrip("0")
+        short = mantissa[0]
+        if len(mantissa) > 1:
+            short += "." + mantissa[1:]
+        short += f"e{len(text) - 1}"
+        if NumberKeys.cost(short) < NumberKeys.cost(text):
+            return short
+        return text
+
+    @staticmethod
+    def messages(text):
+        """Return the message, wParam pairs that type text."""
+        messages = []
+        for c in text:
+            if c.isdigit():
+                messages.append((wcon.WM_KEYUP, ord(c)))
+                continue
+            key = NumberKeys.VK_OEM_PERIOD if c == "." else ord(c.upper())
+            messages.append((wcon.WM_KEYDOWN, key))
+            messages.append((wcon.WM_KEYUP, key))
+        return messages
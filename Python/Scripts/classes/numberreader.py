@@ -0,0 +1,126 @@
+"""Parse numbers read by OCR and check them against earlier values."""
+from collections import deque
+from decimal import Decimal
+import re
+import time
+
+
+class NumberReader():
+    """Read one numeric field of the game, like XP or PP.
+
+    parse() understands the formats the game prints: commas, decimals,
+    suffixes and scientific notation, and rates how much the text looks
+    like a single clean number. read() only accepts confident values that
+    are plausible given the field's history, and re-reads a bounded number
+    of times otherwise.
+    """
+
+    # Reads below this confidence are read again
+    THRESHOLD = 0.75
+    # Allowed growth over the fastest rate seen so far
+    GROWTH = 2
+    # Allowed difference from the last value, relative to it
+    MARGIN = 0.1
+    SUFFIXES = {"K": 3, "M": 6, "B": 9, "T": 12}
+    NUMBER = re.compile(r"(\d[\d,]*)(\.\d+)?(?:E\+?(\d+)|([KMBT])\b)?")
+    # Commas may be missing, but if there are any they group by thousands
+    GROUPED = re.compile(r"(\d+|\d{1,3}(,\d{3})+)$")
+
+    def __init__(self, monotonic=False, size=20):
+        """Keyword arguments.
+
+        monotonic -- the value never decreases, like total XP. (default False)
+        size -- number of values kept for the plausibility checks.
+                (default 20)
+        """
+        self.monotonic = monotonic
+        self.history = deque(maxlen=size)
+        self.failures = 0
+        # OCR text of every read done by the last call of read()
+        self.texts = []
+
+    @staticmethod
+    def parse(text):
+        """Return the number in an OCR result and the confidence of it.
+
+        The value is an int unless it has decimals that a suffix or an
+        exponent doesn't make whole. It is None, with no confidence, if
+        there is no number in the text.
+        """
+        text = text.strip().upper()
+        matches = list(NumberReader.NUMBER.finditer(text))
+        if not matches:
+            return None, 0
+        confidence = 1.0
+        if len(matches) > 1:  # Noise read as digits, or a split number
+            confidence *= 0.5
+        match = max(matches, key=lambda m: len(m.group(0)))
+        digits, decimals, exponent, suffix = match.groups()
+        if not NumberReader.GROUPED.match(digits):
+            confidence *= 0.5
+        # Characters stuck to the number are likely misread digits
+        start, end = match.span()
+        if ((start and text[start - 1].isalnum()) or
+           (end < len(text) and text[end].isalnum())):
+            confidence *= 0.5
+        value = Decimal(digits.replace(",", "") + (decimals or ""))
+        if exponent:
+            value = value.scaleb(int(exponent))
+        elif suffix:
+            value = value.scaleb(NumberReader.SUFFIXES[suffix])
+        if value == value.to_integral_value():
+            return int(value), confidence
+        return float(value), confidence
+
+    def plausible(self, value, now=None):
+        """Return True if value fits the history of the field.
+
+        It may not exceed the last value plus the fastest rate seen so far,
+        times GROWTH, for the time since, plus a MARGIN of the last value.
+        Monotonic fields may not decrease either.
+        """
+        if not self.history:
+            return True
+        now = now or time.time()
+        last_time, last = self.history[-1]
+        if self.monotonic and value < last:
+            return False
+        if len(self.history) < 2:
+            return True  # No rate yet, anything larger may be right
+        rate = 0
+        for (t1, v1), (t2, v2) in zip(self.history, list(self.history)[1:]):
+            if t2 > t1:
+                rate = max(rate, (v2 - v1) / (t2 - t1))
+        limit = (last + rate * NumberReader.GROWTH * (now - last_time) +
+                 NumberReader.MARGIN * abs(last))
+        return value <= limit
+
+    def read(self, reads):
+        """Return the first trusted value of a list of reads, or None.
+
+        Each read is a function returning OCR text, later ones are the
+        re-reads. A value is trusted if it is plausible and either confident
+        or agreed on by two reads.
+
+        Keyword arguments:
+        reads -- functions to call in order until a value is trusted.
+        """
+        seen = []
+        self.texts = []
+        for read in reads:
+            self.texts.append(read())
+            value, confidence = self.parse(self.texts[-1])
+            if value is None:
+                continue
+            if ((confidence >= NumberReader.THRESHOLD or value in seen) and
+               self.plausible(value)):
+                self.history.append((time.time(), value))
+                self.failures = 0
+                return value
+            seen.append(value)
+        self.failures += 1
+        return None
+
+    def last(self, default=0):
+        """Return the last trusted value, or default if there is none."""
+        return self.history[-1][1] if self.history else default
@@ -0,0 +1,65 @@
+"""Cache OCR results by the pixels that were read."""
+from collections import OrderedDict
+import hashlib
+
+
+class OcrCache():
+    """Least recently used cache of OCR results.
+
+    Results are keyed by a hash of the cropped pixels and the OCR config, so
+    reading pixels that were read before costs a hash instead of an OCR.
+    """
+
+    # Maximum number of results kept
+    SIZE = 256
+    entries = OrderedDict()
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def key(area, config=""):
+        """Return the cache key of an array of pixels and an OCR config."""
+        digest = hashlib.blake2b(area.tobytes(), digest_size=16)
+        digest.update(repr(area.shape).encode())
+        digest.update(config.encode())
+        return digest.digest()
+
+    @staticmethod
+    def read(area, reader, config=""):
+        """Return the cached result for area, or reader(area) and cache it."""
+        value = OcrCache.get(area, config)
+        if value is None:
+            value = reader(area)
+            OcrCache.put(area, value, config)
+        return value
+
+    @staticmethod
+    def get(area, config=""):
+        """Return the cached result for area, or None and count a miss."""
+        key = OcrCache.key(area, config)
+        if key not in OcrCache.entries:
+            OcrCache.misses += 1
+            return None
+        OcrCache.entries.move_to_end(key)
+        OcrCache.hits += 1
+        return OcrCache.entries[key]
+
+    @staticmethod
+    def put(area, value, config=""):
+        """Cache the result of reading area."""
+        OcrCache.entries[OcrCache.key(area, config)] = value
+        while len(OcrCache.entries) > OcrCache.SIZE:
+            OcrCache.entries.popitem(last=False)
+
+    @staticmethod
+    def hit_rate():
+        """Return the share of reads answered from the cache."""
+        total = OcrCache.hits + OcrCache.misses
+        return OcrCache.hits / total if total else 0
+
+    @staticmethod
+    def clear():
+        """Empty the cache and reset the counters."""
+        OcrCache.entries.clear()
+        OcrCache.hits = 0
+        OcrCache.misses = 0
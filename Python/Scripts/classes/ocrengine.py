@@ -0,0 +1,199 @@
+"""OCR engines that turn images into text."""
+from PIL import Image as image
+from PIL import ImageFilter
+import numpy
+import pytesseract
+import re
+
+try:
+    import tesserocr
+except ImportError:  # Optional, pytesseract is used without it
+    tesserocr = None
+
+
+class OcrEngine():
+    """Interface of an OCR engine.
+
+    Configs use the tesseract command line syntax, for example
+    "--psm 7 -c tessedit_char_whitelist=0123456789".
+    """
+
+    # Blank rows between stitched images, in upscaled pixels
+    SEPARATOR = 24
+
+    def read(self, bmp, config=""):
+        """Return the text in a Pillow image."""
+        raise NotImplementedError
+
+    def read_lines(self, bmp, config=""):
+        """Return the text, top and bottom of every line in a Pillow image."""
+        raise NotImplementedError
+
+    def read_many(self, bmps, config=""):
+        """Return the text in each of several Pillow images.
+
+        The images are stitched into one and read in a single call, then
+        the lines are assigned back to the image they were found in.
+        """
+        if len(bmps) == 1:
+            return [self.read(bmps[0], config)]
+        stitched, bands = self.stitch(bmps)
+        texts = [[] for _ in bmps]
+        for text, top, bottom in self.read_lines(stitched,
+                                                 self.block_config(config)):
+            center = (top + bottom) / 2
+            for i, (band_top, band_bottom) in enumerate(bands):
+                if band_top <= center < band_bottom:
+                    texts[i].append(text)
+                    break
+        return ["\n".join(lines) for lines in texts]
+
+    def close(self):
+        """Free the resources held by the engine."""
+        pass
+
+    @staticmethod
+    def default():
+        """Return the fastest engine that is installed."""
+        if tesserocr:
+            return TesserocrEngine()
+        return PytesseractEngine()
+
+    @staticmethod
+    def prepare(area):
+        """Crop an RGB array to its content, upscale and sharpen it."""
+        bmp = image.fromarray(area)
+        *_, right, lower = bmp.getbbox()
+        bmp = bmp.resize((right*3, lower*3), image.BICUBIC)  # Resize image
+        bmp = bmp.filter(ImageFilter.SHARPEN)  # Sharpen image for better OCR
+        return bmp
+
+    @staticmethod
+    def stitch(bmps):
+        """Stack Pillow images into one, return it and the rows of each.
+
+        Every image is padded to the common width and separated from the
+        next by SEPARATOR rows, both in its own background color.
+        """
+        arrays = [numpy.asarray(bmp.convert("RGB")) for bmp in bmps]
+        width = max(a.shape[1] for a in arrays)
+        gap = OcrEngine.SEPARATOR
+        bands = []
+        rows = []
+        top = 0
+        for a in arrays:
+            band = numpy.empty((a.shape[0] + gap, width, 3), dtype=numpy.uint8)
+            band[:] = a[0, 0]  # The corner is background after prepare()
+            band[gap // 2:gap // 2 + a.shape[0], :a.shape[1]] = a
+            rows.append(band)
+            bands.append((top, top + band.shape[0]))
+            top += band.shape[0]
+        return image.fromarray(numpy.concatenate(rows)), bands
+
+    @staticmethod
+    def block_config(config):
+        """Return config with the page segmentation for a block of lines."""
+        config = re.sub(r"--psm\s+\d+", "", config)
+        return f"--psm 6 {config}".strip()
+
+    @staticmethod
+    def parse_config(config):
+        """Split a command line config into a psm and tesseract variables."""
+        psm = None
+        variables = {}
+        tokens = config.split()
+        for option, value in zip(tokens, tokens[1:]):
+            if option == "--psm":
+                psm = int(value)
+            elif option == "-c":
+                name, _, setting = value.partition("=")
+                variables[name] = setting
+        return psm, variables
+
+
+class PytesseractEngine(OcrEngine):
+    """Run the tesseract executable for every read, through pytesseract."""
+
+    def read(self, bmp, config=""):
+        """Return the text in a Pillow image."""
+        return pytesseract.image_to_string(bmp, config=config)
+
+    def read_lines(self, bmp, config=""):
+        """Return the text, top and bottom of every line in a Pillow image."""
+        data = pytesseract.image_to_data(bmp, config=config,
+                                         output_type=pytesseract.Output.DICT)
+        lines = {}
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            line = (data["block_num"][i], data["par_num"][i],
+                    data["line_num"][i])
+            top = data["top"][i]
+            bottom = top + data["height"][i]
+            words, line_top, line_bottom = lines.get(line, ([], top, bottom))
+            words.append(word)
+            lines[line] = (words, min(top, line_top), max(bottom, line_bottom))
+        return [(" ".join(words), top, bottom)
+                for words, top, bottom in lines.values()]
+
+
+class TesserocrEngine(OcrEngine):
+    """Keep tesseract loaded in this process through its C API.
+
+    Requires the tesserocr package. Images are passed in memory, and one
+    initialized tesseract instance is kept per config, so switching between
+    fields doesn't reload anything.
+    """
+
+    def __init__(self, path=None):
+        """Keyword arguments.
+
+        path -- the tessdata folder, None uses the one tesseract was built
+                with or TESSDATA_PREFIX. (default None)
+        """
+        self.path = path
+        self.apis = {}
+
+    def api(self, config):
+        """Return the tesseract instance for a config."""
+        if config not in self.apis:
+            psm, variables = self.parse_config(config)
+            kwargs = {"lang": "eng"}
+            if self.path:
+                kwargs["path"] = self.path
+            if psm is not None:
+                kwargs["psm"] = psm
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            for name, value in variables.items():
+                api.SetVariable(name, value)
+            self.apis[config] = api
+        return self.apis[config]
+
+    def read(self, bmp, config=""):
+        """Return the text in a Pillow image."""
+        api = self.api(config)
+        api.SetImage(bmp)
+        return api.GetUTF8Text().strip()
+
+    def read_lines(self, bmp, config=""):
+        """Return the text, top and bottom of every line in a Pillow image."""
+        api = self.api(config)
+        api.SetImage(bmp)
+        api.Recognize()
+        lines = []
+        iterator = api.GetIterator()
+        if iterator is None:
+            return lines
+        level = tesserocr.RIL.TEXTLINE
+        for line in tesserocr.iterate_level(iterator, level):
+            text = line.GetUTF8Text(level).strip()
+            box = line.BoundingBox(level)
+            if text and box:
+                lines.append((text, box[1], box[3]))
+        return lines
+
+    def close(self):
+        """Shut down every tesseract instance."""
+        for api in self.apis.values():
+            api.End()
+        self.apis.clear()
@@ -0,0 +1,151 @@
+"""Run OCR in worker processes while the bot keeps sending inputs."""
+from classes.ocrengine import OcrEngine
+from classes.ocrprofile import OcrProfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy
+import os
+import threading
+import time
+
+
+class OcrPool():
+    """A pool of processes that read areas of shared frames.
+
+    A frame is copied into shared memory once, however many areas of it are
+    read, and the workers crop the areas from there. Every worker keeps its
+    own OCR engine. read() returns a Future of the text.
+
+    Shared memory blocks are reused for later frames once no reads of them
+    are pending.
+    """
+
+    # Engine of the worker process, see start_worker()
+    engine = None
+
+    def __init__(self, workers=None):
+        """Keyword arguments.
+
+        workers -- number of processes, None uses the number of CPUs minus
+                   one for the bot itself. (default None)
+        """
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.executor = ProcessPoolExecutor(self.workers,
+                                            initializer=OcrPool.start_worker)
+        self.lock = threading.Lock()
+        # Block name: [SharedMemory, pending reads]
+        self.blocks = {}
+        self.current = None  # Frame and name of the block it was copied to
+        self.pending = 0
+        self.busy = 0
+        self.started = time.perf_counter()
+        # Seconds from read() until the result arrived
+        self.latencies = deque(maxlen=1000)
+
+    @staticmethod
+    def start_worker():
+        """Create the OCR engine of a worker process."""
+        OcrPool.engine = OcrEngine.default()
+
+    @staticmethod
+    def work(name, shape, box, profile):
+        """Read an area of a shared frame, return the text and busy time.
+
+        Runs in a worker process.
+        """
+        start = time.perf_counter()
+        memory = shared_memory.SharedMemory(name=name)
+        try:
+            bgrx = numpy.ndarray(shape, dtype=numpy.uint8, buffer=memory.buf)
+            x_start, y_start, x_end, y_end = box
+            area = numpy.ascontiguousarray(
+                bgrx[y_start:y_end, x_start:x_end, 2::-1])
+            del bgrx  # The block can't be closed while it is viewed
+        finally:
+            memory.close()
+        profile = OcrProfile.get(profile)
+        text = OcrPool.engine.read(profile.prepare(area), profile.config)
+        return text, time.perf_counter() - start
+
+    def share(self, frame):
+        """Copy a frame to shared memory unless it is there, return the name.
+
+        Called with the lock held.
+        """
+        if self.current and self.current[0] is frame:
+            return self.current[1]
+        size = frame.bgrx.nbytes
+        name = next((n for n, (block, pending) in self.blocks.items()
+                     if not pending and block.size >= size), None)
+        if name is None:
+            block = shared_memory.SharedMemory(create=True, size=size)
+            name = block.name
+            self.blocks[name] = [block, 0]
+        block = self.blocks[name][0]
+        shared = numpy.ndarray(frame.bgrx.shape, dtype=numpy.uint8,
+                               buffer=block.buf)
+        numpy.copyto(shared, frame.bgrx)
+        self.current = (frame, name)
+        return name
+
+    def read(self, frame, box, profile=None):
+        """Read an area of a frame in a worker, return a Future of the text.
+
+        Keyword arguments:
+        frame -- the Frame to read from. It may be reused once read()
+                 returns.
+        box -- x_start, y_start, x_end, y_end of the area, in frame pixels.
+        profile -- name of the OcrProfile to read with. (default None)
+        """
+        submitted = time.perf_counter()
+        with self.lock:
+            name = self.share(frame)
+            self.blocks[name][1] += 1
+            self.pending += 1
+            future = self.executor.submit(OcrPool.work, name,
+                                          frame.bgrx.shape, box, profile)
+        result = Future()
+
+        def done(future):
+            error = future.exception()
+            with self.lock:
+                self.blocks[name][1] -= 1
+                self.pending -= 1
+                self.latencies.append(time.perf_counter() - submitted)
+                if not error:
+                    text, busy = future.result()
+                    self.busy += busy
+            if error:
+                result.set_exception(error)
+            else:
+                result.set_result(text)
+
+        future.add_done_callback(done)
+        return result
+
+    def stats(self):
+        """Return the queue depth, worker utilization and latency in ms.
+
+        Utilization is the share of worker time spent reading since the pool
+        started. Latency is the median and worst of the recent reads.
+        """
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            latencies = numpy.array(self.latencies) * 1000
+            return {"pending": self.pending,
+                    "utilization": self.busy / (elapsed * self.workers),
+                    "latency_median": (numpy.median(latencies)
+                                       if len(latencies) else 0),
+                    "latency_worst": (latencies.max()
+                                      if len(latencies) else 0)}
+
+    def close(self):
+        """Wait for pending reads, stop the workers and free the memory."""
+        self.executor.shutdown()
+        with self.lock:
+            for block, _ in self.blocks.values():
+                block.close()
+                block.unlink()
+            self.blocks.clear()
+            self.current = None
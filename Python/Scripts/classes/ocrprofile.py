@@ -0,0 +1,81 @@
+"""Preprocessing and tesseract settings per kind of OCR field."""
+from classes.ocrengine import OcrEngine
+from PIL import Image as image
+import cv2
+import numpy
+
+
+class OcrProfile():
+    """How to prepare and read one kind of field.
+
+    Binarizing profiles scale the area in grayscale, threshold it with Otsu
+    and turn it into dark text on white with a margin, which is what
+    tesseract reads best. The other profiles use OcrEngine.prepare().
+    """
+
+    # Profiles by name, see get()
+    profiles = {}
+    # White pixels added around binarized images
+    MARGIN = 8
+
+    def __init__(self, name, scale=3, binarize=False, psm=None,
+                 whitelist=None):
+        """Keyword arguments.
+
+        name -- name of the profile, used as its OCR cache config.
+        scale -- upscaling factor of binarized images. (default 3)
+        binarize -- threshold the image instead of the legacy upscale and
+                    sharpen. (default False)
+        psm -- tesseract page segmentation mode. (default None)
+        whitelist -- the only characters tesseract may read. (default None)
+        """
+        self.name = name
+        self.scale = scale
+        self.binarize = binarize
+        self.psm = psm
+        self.whitelist = whitelist
+        options = []
+        if psm is not None:
+            options.append(f"--psm {psm}")
+        if whitelist:
+            options.append(f"-c tessedit_char_whitelist={whitelist}")
+        self.config = " ".join(options)
+
+    @staticmethod
+    def get(name=None):
+        """Return the profile called name, the default one if None."""
+        return OcrProfile.profiles[name or "default"]
+
+    @staticmethod
+    def add(profile):
+        """Register a profile under its name."""
+        OcrProfile.profiles[profile.name] = profile
+
+    def prepare(self, area):
+        """Return a Pillow image of an RGB array, ready for the OCR."""
+        if not self.binarize:
+            return OcrEngine.prepare(area)
+        gray = cv2.cvtColor(area, cv2.COLOR_RGB2GRAY)
+        gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale,
+                          interpolation=cv2.INTER_CUBIC)
+        _, binary = cv2.threshold(gray, 0, 255,
+                                  cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Text covers less of the area than the background
+        if numpy.count_nonzero(binary) < binary.size / 2:
+            binary = 255 - binary
+        binary = cv2.copyMakeBorder(binary, *[OcrProfile.MARGIN] * 4,
+                                    cv2.BORDER_CONSTANT, value=255)
+        return image.fromarray(binary)
+
+
+# The recipe ocr() always used
+OcrProfile.add(OcrProfile("default"))
+# Plain integers like boss numbers
+OcrProfile.add(OcrProfile("digits", scale=2, binarize=True, psm=7,
+                          whitelist="0123456789,"))
+# Numbers that switch to scientific notation, like 1.234E+15, and the
+# lowercase 6e8 that send_number() types into input boxes
+OcrProfile.add(OcrProfile("scientific", scale=2, binarize=True, psm=7,
+                          whitelist="0123456789,.Ee+"))
+# A line of text, like a label with a number in it
+OcrProfile.add(OcrProfile("text", scale=2, binarize=True, psm=7))
@@ -0,0 +1,68 @@
+"""Vectorized pixel searches over captured frames."""
+import numpy
+
+
+class PixelSearch():
+    """Search RGB arrays for one or several colors in a single pass.
+
+    Arrays are indexed [y, x] and hold RGB values, the way numpy.asarray()
+    returns a Pillow image. Colors can be supplied in hex or as packed
+    0xRRGGBB integers.
+    """
+
+    @staticmethod
+    def pack(rgb):
+        """Pack an RGB array into a 2D array of 0xRRGGBB integers."""
+        rgb = numpy.asarray(rgb)
+        return (rgb[..., 0].astype(numpy.uint32) << 16 |
+                rgb[..., 1].astype(numpy.uint32) << 8 |
+                rgb[..., 2].astype(numpy.uint32))
+
+    @staticmethod
+    def to_int(color):
+        """Convert a hex color to a packed 0xRRGGBB integer."""
+        if isinstance(color, str):
+            return int(color, 16)
+        return int(color)
+
+    @staticmethod
+    def mask(rgb, colors, tolerance=0):
+        """Return a boolean array of the pixels matching any of the colors.
+
+        Keyword arguments:
+        colors -- a single color or a list of colors.
+        tolerance -- allowed difference per channel, either a single value or
+                     one value per channel (R, G, B). (default 0)
+        """
+        if isinstance(colors, (str, int)):
+            colors = [colors]
+        targets = [PixelSearch.to_int(c) for c in colors]
+        if not numpy.any(tolerance):
+            return numpy.isin(PixelSearch.pack(rgb),
+                              numpy.array(targets, dtype=numpy.uint32))
+
+        rgb = numpy.asarray(rgb)[..., :3].astype(numpy.int16)
+        tolerance = numpy.broadcast_to(numpy.asarray(tolerance,
+                                                     dtype=numpy.int16), (3,))
+        mask = numpy.zeros(rgb.shape[:2], dtype=bool)
+        for t in targets:
+            target = numpy.array([t >> 16 & 0xff, t >> 8 & 0xff, t & 0xff],
+                                 dtype=numpy.int16)
+            mask |= (numpy.abs(rgb - target) <= tolerance).all(axis=-1)
+        return mask
+
+    @staticmethod
+    def first(rgb, colors, tolerance=0):
+        """Return x, y of the first match in row-major order, or None."""
+        mask = PixelSearch.mask(rgb, colors, tolerance)
+        i = int(mask.argmax())
+        if not mask.flat[i]:
+            return None
+        y, x = divmod(i, mask.shape[1])
+        return x, y
+
+    @staticmethod
+    def all(rgb, colors, tolerance=0):
+        """Return a list with x, y of every match in row-major order."""
+        ys, xs = numpy.nonzero(PixelSearch.mask(rgb, colors, tolerance))
+        return list(zip(xs.tolist(), ys.tolist()))
@@ -0,0 +1,68 @@
+"""Track which named screen regions changed since they were last read."""
+import zlib
+
+
+class Regions():
+    """Remember a checksum and the decoded value per named region.
+
+    The checksum is a CRC32 of the region's pixels. The regions read by OCR
+    are a few kilobytes, so this costs microseconds, while it catches the
+    single pixel strokes that tell digits apart.
+    """
+
+    checksums = {}
+    values = {}
+    # The last area read per region, see Inputs.archive_region()
+    areas = {}
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def checksum(area):
+        """Return a checksum of an array of pixels."""
+        return area.shape, zlib.crc32(area.tobytes())
+
+    @staticmethod
+    def changed(name, area, update=True):
+        """Return True if the area differs from the last one seen for name.
+
+        Keyword arguments:
+        update -- remember this area as the last one seen. (default True)
+        """
+        checksum = Regions.checksum(area)
+        changed = Regions.checksums.get(name) != checksum
+        if update and changed:
+            Regions.checksums[name] = checksum
+            Regions.values.pop(name, None)
+        return changed
+
+    @staticmethod
+    def read(name, area, reader):
+        """Return reader(area), or the previous value if nothing changed.
+
+        Values are only remembered if reader returns without raising.
+        """
+        checksum = Regions.checksum(area)
+        Regions.areas[name] = area
+        if name in Regions.values and Regions.checksums.get(name) == checksum:
+            Regions.hits += 1
+            return Regions.values[name]
+        Regions.misses += 1
+        Regions.checksums.pop(name, None)
+        Regions.values.pop(name, None)
+        value = reader(area)
+        Regions.checksums[name] = checksum
+        Regions.values[name] = value
+        return value
+
+    @staticmethod
+    def forget(name=None):
+        """Forget one region, or all of them if name is None."""
+        if name is None:
+            Regions.checksums.clear()
+            Regions.values.clear()
+            Regions.areas.clear()
+        else:
+            Regions.checksums.pop(name, None)
+            Regions.values.pop(name, None)
+            Regions.areas.pop(name, None)
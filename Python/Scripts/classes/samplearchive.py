@@ -0,0 +1,146 @@
+"""Keep the crops the OCR failed on, to grow the benchmark corpus."""
+from PIL import Image as image
+from collections import deque
+import cv2
+import json
+import numpy
+import os
+import queue
+import threading
+import time
+
+
+class SampleArchive():
+    """Archive of crops that were misread or read with low confidence.
+
+    Crops are queued by add() and written by a background thread, so the
+    bot only pays for a copy of the crop. They are stored by a difference
+    hash of their pixels, which makes crops that differ by a few pixels of
+    noise share one file. The folder has the layout of a Corpus, with the
+    raw OCR text as label, so fixing the labels turns it into a benchmark
+    corpus. samples.json keeps the profile, text and time of every crop,
+    keyed by region/name since every region has a folder of its own.
+
+    When the folder grows over MAX_BYTES the oldest crops are removed.
+    """
+
+    PATH = "ocr_failures"
+    MAX_BYTES = 20 * 1024 * 1024
+    # Crops whose hashes differ in at most this many bits are duplicates
+    DISTANCE = 4
+    pending = queue.Queue(maxsize=64)
+    writer = None
+    index = None
+    added = 0
+    duplicates = 0
+    dropped = 0
+
+    @staticmethod
+    def add(region, area, text, profile=None):
+        """Queue a crop for the archive, never blocks.
+
+        Keyword arguments:
+        region -- name of the OCR region the crop is from.
+        area -- RGB array of the crop.
+        text -- what the OCR read.
+        profile -- name of the OcrProfile it was read with. (default None)
+        """
+        if SampleArchive.writer is None or not SampleArchive.writer.is_alive():
+            SampleArchive.writer = threading.Thread(target=SampleArchive.run,
+                                                    daemon=True)
+            SampleArchive.writer.start()
+        try:
+            SampleArchive.pending.put_nowait((region, area.copy(), text,
+                                              profile, time.time()))
+        except queue.Full:
+            SampleArchive.dropped += 1
+
+    @staticmethod
+    def dhash(area):
+        """Return the 64 bit difference hash of an RGB array."""
+        gray = cv2.cvtColor(area, cv2.COLOR_RGB2GRAY)
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).ravel()
+        return int(numpy.packbits(bits).view(">u8")[0])
+
+    @staticmethod
+    def run():
+        """Write queued crops to the archive, runs on the writer thread."""
+        while True:
+            SampleArchive.write(*SampleArchive.pending.get())
+
+    @staticmethod
+    def load():
+        """Return the metadata of the archive, loading it on first use."""
+        if SampleArchive.index is None:
+            path = os.path.join(SampleArchive.PATH, "samples.json")
+            SampleArchive.index = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    saved = json.load(f)
+                # Archives from before the key held the region too
+                SampleArchive.index = {
+                    key if "/" in key else f"{sample['region']}/{key}": sample
+                    for key, sample in saved.items()}
+        return SampleArchive.index
+
+    @staticmethod
+    def write(region, area, text, profile, timestamp):
+        """Store a crop unless a near duplicate is stored already."""
+        index = SampleArchive.load()
+        digest = SampleArchive.dhash(area)
+        for key, sample in index.items():
+            if (sample["region"] == region and
+               bin(int(key.split("/")[-1][:16], 16) ^ digest).count("1") <=
+               SampleArchive.DISTANCE):
+                SampleArchive.duplicates += 1
+                return
+        name = f"{digest:016x}{area.shape[1]:04x}{area.shape[0]:04x}.png"
+        folder = os.path.join(SampleArchive.PATH, region)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, name)
+        image.fromarray(area).save(path, optimize=True)
+        index[f"{region}/{name}"] = {"region": region, "profile": profile, "text": text,
+                       "time": timestamp, "bytes": os.path.getsize(path)}
+        SampleArchive.set_label(region, name, text)
+        SampleArchive.added += 1
+        SampleArchive.evict()
+        SampleArchive.save()
+
+    @staticmethod
+    def set_label(region, name, text):
+        """Set or remove (text None) the label of a crop in labels.json."""
+        path = os.path.join(SampleArchive.PATH, region, "labels.json")
+        labels = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                labels = json.load(f)
+        if text is None:
+            labels.pop(name, None)
+        else:
+            labels[name] = text.strip()
+        with open(path, "w") as f:
+            json.dump(labels, f, indent=1, sort_keys=True)
+
+    @staticmethod
+    def evict():
+        """Remove the oldest crops until the archive fits in MAX_BYTES."""
+        index = SampleArchive.index
+        oldest = deque(sorted(index, key=lambda n: index[n]["time"]))
+        total = sum(sample["bytes"] for sample in index.values())
+        while total > SampleArchive.MAX_BYTES and oldest:
+            key = oldest.popleft()
+            sample = index.pop(key)
+            total -= sample["bytes"]
+            name = key.split("/")[-1]
+            path = os.path.join(SampleArchive.PATH, sample["region"], name)
+            if os.path.exists(path):
+                os.remove(path)
+            SampleArchive.set_label(sample["region"], name, None)
+
+    @staticmethod
+    def save():
+        """Write the metadata of the archive."""
+        path = os.path.join(SampleArchive.PATH, "samples.json")
+        with open(path, "w") as f:
+            json.dump(SampleArchive.index, f, indent=1)
@@ -0,0 +1,144 @@
+"""Tell which screen the game shows from the colors of a few pixels."""
+from classes.pixelsearch import PixelSearch
+import json
+import ngucon as ncon
+import numpy
+import os
+
+
+class Screens():
+    """Classify the screen of the game by learned probe pixels.
+
+    learn() gets two captures of every screen, taken a while apart. It
+    skips the pixels that changed between them, like counters and
+    animations, and picks the probes that tell most pairs of screens apart
+    until every pair differs in SEPARATION probes. It goes on separating the
+    pairs further until there are MIN_PROBES, so a covered probe doesn't
+    lose the screen and a screen that wasn't learned, like a popup, doesn't
+    match a learned one by a few pixels. The colors of a screen
+    at the probes are its fingerprint. classify() returns the screen whose
+    fingerprint differs least from the probe colors of one capture.
+    """
+
+    PATH = "screens.json"
+    # Area the probes are picked from, relative to the game
+    AREA = (0, 0, ncon.CONTENTX2, ncon.CONTENTY2)
+    # Distance in pixels between the candidate probes
+    STEP = 4
+    MIN_PROBES = 16
+    MAX_PROBES = 48
+    # Probes every pair of screens should differ in
+    SEPARATION = 4
+    # Share of the probes that may differ from a fingerprint, for tooltips
+    # and popups covering a part of the screen
+    TOLERANCE = 0.25
+    probes = None
+    names = None
+    fingerprints = None
+
+    @staticmethod
+    def ready():
+        """Return True if probes were learned, loading them on first use."""
+        if Screens.probes is None:
+            Screens.load()
+        return bool(Screens.probes)
+
+    @staticmethod
+    def load():
+        """Load the probes and fingerprints, if they were saved."""
+        Screens.probes = []
+        if not os.path.exists(Screens.PATH):
+            return
+        with open(Screens.PATH) as f:
+            saved = json.load(f)
+        Screens.probes = [tuple(probe) for probe in saved["probes"]]
+        Screens.names = sorted(saved["fingerprints"])
+        Screens.fingerprints = numpy.array([saved["fingerprints"][name]
+                                            for name in Screens.names])
+
+    @staticmethod
+    def save():
+        """Save the probes and fingerprints."""
+        fingerprints = dict(zip(Screens.names,
+                                Screens.fingerprints.tolist()))
+        with open(Screens.PATH, "w") as f:
+            json.dump({"probes": Screens.probes,
+                       "fingerprints": fingerprints}, f, indent=1)
+
+    @staticmethod
+    def reset():
+        """Forget the probes, so nothing is classified until learn()."""
+        Screens.probes = []
+        Screens.names = None
+        Screens.fingerprints = None
+
+    @staticmethod
+    def learn(captures):
+        """Pick probes and fingerprints, save them and return weak pairs.
+
+        Returns the pairs of screens that differ in less than SEPARATION
+        probes. Pairs that differ in none can't be told apart.
+
+        Keyword arguments:
+        captures -- dictionary of screen name: two RGB arrays of AREA.
+        """
+        names = sorted(captures)
+        step = Screens.STEP
+        packed = [[PixelSearch.pack(c)[::step, ::step]
+                   for c in captures[name]] for name in names]
+        stable = numpy.logical_and.reduce([c == screen[0] for screen in packed
+                                           for c in screen[1:]])
+        ys, xs = numpy.nonzero(stable)
+        colors = numpy.array([screen[0] for screen in packed])[:, ys, xs]
+        pairs = [(a, b) for a in range(len(names))
+                 for b in range(a + 1, len(names))]
+        first, second = numpy.array(pairs).T
+        differs = colors[first] != colors[second]
+        needed = numpy.full(len(pairs), Screens.SEPARATION)
+        chosen = []
+        while len(chosen) < Screens.MAX_PROBES:
+            gain = differs[needed > 0].sum(axis=0)
+            best = int(gain.argmax())
+            if gain[best] == 0:
+                if len(chosen) >= Screens.MIN_PROBES or not differs.any():
+                    break
+                needed += 1
+                continue
+            chosen.append(best)
+            needed -= differs[:, best]
+            differs[:, best] = False
+        # Screens alike everywhere else still get MIN_PROBES, spread over the
+        # stable pixels, so a popup covering them isn't taken for a screen
+        spread = numpy.linspace(0, len(xs) - 1, Screens.MIN_PROBES * 2)
+        spare = [int(i) for i in spread if int(i) not in chosen]
+        chosen += spare[:max(Screens.MIN_PROBES - len(chosen), 0)]
+        Screens.probes = [(int(xs[i]) * step + Screens.AREA[0],
+                           int(ys[i]) * step + Screens.AREA[1])
+                          for i in chosen]
+        Screens.names = names
+        Screens.fingerprints = colors[:, chosen]
+        Screens.save()
+        fingerprints = Screens.fingerprints
+        apart = (fingerprints[first] != fingerprints[second]).sum(axis=1)
+        return [(names[a], names[b]) for (a, b), count in zip(pairs, apart)
+                if count < Screens.SEPARATION]
+
+    @staticmethod
+    def classify(colors):
+        """Return the screen the probe colors belong to, or None.
+
+        None is returned if no fingerprint is close enough, or if two are
+        equally close.
+
+        Keyword arguments:
+        colors -- the packed colors at the probes, in the order of probes.
+        """
+        misses = numpy.count_nonzero(Screens.fingerprints !=
+                                     numpy.array(colors), axis=1)
+        order = numpy.argsort(misses)
+        best = order[0]
+        if misses[best] > Screens.TOLERANCE * len(Screens.probes):
+            return None
+        if len(order) > 1 and misses[order[1]] == misses[best]:
+            return None
+        return Screens.names[best]
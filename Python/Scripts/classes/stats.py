@@ -1,6 +1,7 @@
 """Handles various statistics."""
 from classes.navigation import Navigation
 from classes.discord import Discord
+from classes.numberreader import NumberReader
 
 import ngucon as ncon
 import re
@@ -15,38 +16,44 @@ class Stats(Navigation):
     xp = 0
     pp = 0
     start_time = time.time()
+    # Reads in a row that couldn't be trusted, 0 if the last one was read
     OCR_failures = 0
+    # Readers of the values, with their OCR region and menu
+    readers = {"TOTAL XP": (NumberReader(monotonic=True), "total_xp",
+                            "misc"),
+               "XP": (NumberReader(), "xp", "exp"),
+               "PP": (NumberReader(), "pp", "perks")}
+    # Profiles the value is read again with if the first read is doubtful
+    RETRY_PROFILES = ["default", "scientific"]
 
     def ocr_value(self, value):
-        """Store start EXP via OCR."""
-        try:
-            if value == "TOTAL XP":
-                self.misc()
-                Stats.total_xp = int(float(self.ocr(ncon.OCR_EXPX1, ncon.OCR_EXPY1, ncon.OCR_EXPX2, ncon.OCR_EXPY2)))
-                # print("OCR Captured TOTAL XP: {:,}".format(Stats.total_xp))
-                Stats.OCR_failures = 0
-                return Stats.total_xp
-            elif value == "XP":
-                self.exp()
-                Stats.xp = int(self.remove_letters(self.ocr(ncon.EXPX1, ncon.EXPY1, ncon.EXPX2, ncon.EXPY2)))
-                # print("OCR Captured Current XP: {:,}".format(Stats.xp))
-                Stats.OCR_failures = 0
-                return Stats.xp
-            elif value == "PP":
-                self.perks()
-                Stats.pp = int(self.remove_letters(self.ocr(ncon.PPX1, ncon.PPY1, ncon.PPX2, ncon.PPY2)))
-                # print("OCR Captured Current PP: {:,}".format(Stats.pp))
-                Stats.OCR_failures = 0
-                return Stats.pp
-        except ValueError:
+        """Read and store TOTAL XP, XP or PP, returns the value.
+
+        Doubtful reads are read again with the RETRY_PROFILES. If none of
+        the reads can be trusted, the last stored value is returned and
+        Stats.OCR_failures is increased.
+        """
+        reader, region, menu = Stats.readers[value]
+        getattr(self, menu)()
+        *area, _ = ncon.OCR_REGIONS[region]
+        reads = [lambda: self.ocr_region(region)]
+        reads += [lambda p=p: self.ocr(*area, profile=p)
+                  for p in Stats.RETRY_PROFILES]
+        result = reader.read(reads)
+        if len(reader.texts) > 1:  # The first read wasn't trusted
+            self.archive_region(region, reader.texts[0])
+        if result is None:
             Stats.OCR_failures += 1
-            if Stats.OCR_failures <= 3:
-                print("OCR couldn't detect {}, retrying.".format(value))
-                self.ocr_value(value)
-                return
-            else:
-                print("Something went wrong with the OCR")
-                return
+            print(f"OCR couldn't detect {value}, keeping the last value")
+            return reader.last()
+        Stats.OCR_failures = 0
+        if value == "TOTAL XP":
+            Stats.total_xp = result
+        elif value == "XP":
+            Stats.xp = result
+        else:
+            Stats.pp = result
+        return result
 
 class EstimateRate(Stats):
 
@@ -0,0 +1,167 @@
+"""Cached templates and coarse to fine matching for image searches."""
+import cv2
+import os
+
+
+class Templates():
+    """Load templates once and match them with an image pyramid.
+
+    Templates are cached by path and loaded again when the file changes on
+    disk. Matching starts on downscaled copies of the area and the template,
+    and refines the best few coarse matches at full size. If the refined
+    match scores worse than the coarse one promised, or below the threshold,
+    the area is searched again at full size.
+    """
+
+    cache = {}
+    loads = 0
+    # Coarse to fine matches that had to be redone at full size
+    fallbacks = 0
+    # Smallest template side worth matching on a downscaled level
+    MIN_SIZE = 8
+    # Pixels searched around the coarse match on each finer level
+    MARGIN = 3
+    # Coarse matches that are refined, in case the best one is wrong
+    CANDIDATES = 8
+    # How much a refined score may fall short of the coarse one before the
+    # full size search is run
+    SLACK = 0.02
+
+    @staticmethod
+    def pyramid(gray, levels):
+        """Return a list of the image halved up to levels times."""
+        images = [gray]
+        for _ in range(levels):
+            if min(images[-1].shape) < 2 * Templates.MIN_SIZE:
+                break
+            images.append(cv2.pyrDown(images[-1]))
+        return images
+
+    @staticmethod
+    def get(path, levels=2):
+        """Return the grayscale pyramid of the template at path."""
+        mtime = os.path.getmtime(path)
+        entry = Templates.cache.get(path)
+        if entry is None or entry[0] != mtime or entry[1] < levels:
+            gray = cv2.imread(path, 0)
+            if gray is None:
+                raise RuntimeError(f"Couldn't load template {path}")
+            entry = (mtime, levels, Templates.pyramid(gray, levels))
+            Templates.cache[path] = entry
+            Templates.loads += 1
+        return entry[2]
+
+    @staticmethod
+    def match(area, templates, threshold=None, levels=2):
+        """Search a grayscale area for one or several templates.
+
+        Returns a tuple (x, y, score, path) of the best match, where x, y is
+        the top left corner of the match in the area and score is between -1
+        and 1. Returns None if no score reaches the threshold.
+
+        Keyword arguments:
+        templates -- path or list of paths to the templates.
+        threshold -- minimum score of a match, None accepts any. (default None)
+        levels -- how many times the images are halved for the coarse search.
+                  (default 2)
+        """
+        if isinstance(templates, str):
+            templates = [templates]
+        areas = Templates.pyramid(area, levels)
+        best = None
+        for path in templates:
+            found = Templates.match_one(areas, Templates.get(path, levels),
+                                        threshold)
+            if found and (best is None or found[2] > best[2]):
+                best = found + (path,)
+        if best is None or (threshold is not None and best[2] < threshold):
+            return None
+        return best
+
+    @staticmethod
+    def fits(template, area, level):
+        """Return True if the template can be matched on this level."""
+        if level > 0 and min(template.shape) < Templates.MIN_SIZE:
+            return False
+        return (template.shape[0] <= area.shape[0] and
+                template.shape[1] <= area.shape[1])
+
+    @staticmethod
+    def peaks(res, count, width, height):
+        """Return up to count (score, x, y) maxima of a match result.
+
+        Each maximum blanks out the matches overlapping it by more than half
+        the template, so the peaks are different places.
+        """
+        res = res.copy()
+        peaks = []
+        for _ in range(count):
+            _, score, _, (x, y) = cv2.minMaxLoc(res)
+            if peaks and score <= -1:
+                break
+            peaks.append((score, x, y))
+            res[max(y - height // 2, 0):y + height // 2 + 1,
+                max(x - width // 2, 0):x + width // 2 + 1] = -1
+        return peaks
+
+    @staticmethod
+    def refine(areas, templates, level, x, y):
+        """Follow a match on level down to full size, return x, y, score."""
+        score = None
+        while level > 0:
+            level -= 1
+            area = areas[level]
+            height, width = templates[level].shape
+            x0 = max(2 * x - Templates.MARGIN, 0)
+            y0 = max(2 * y - Templates.MARGIN, 0)
+            x1 = min(2 * x + Templates.MARGIN + width, area.shape[1])
+            y1 = min(2 * y + Templates.MARGIN + height, area.shape[0])
+            res = cv2.matchTemplate(area[y0:y1, x0:x1], templates[level],
+                                    cv2.TM_CCOEFF_NORMED)
+            _, score, _, (x, y) = cv2.minMaxLoc(res)
+            x += x0
+            y += y0
+        return x, y, score
+
+    @staticmethod
+    def full(area, template):
+        """Search the whole area at full size, return x, y, score."""
+        res = cv2.matchTemplate(area, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(res)
+        return x, y, score
+
+    @staticmethod
+    def match_one(areas, templates, threshold=None):
+        """Match one template pyramid against an area pyramid.
+
+        Returns a tuple (x, y, score) or None if the template is larger than
+        the area.
+
+        Keyword arguments:
+        threshold -- score a refined match has to reach to skip the full
+                     size search, None only compares it with the coarse
+                     score. (default None)
+        """
+        level = min(len(areas), len(templates)) - 1
+        while level >= 0 and not Templates.fits(templates[level],
+                                                 areas[level], level):
+            level -= 1
+        if level < 0:
+            return None
+        if level == 0:
+            return Templates.full(areas[0], templates[0])
+
+        res = cv2.matchTemplate(areas[level], templates[level],
+                                cv2.TM_CCOEFF_NORMED)
+        height, width = templates[level].shape
+        peaks = Templates.peaks(res, Templates.CANDIDATES, width, height)
+        best = None
+        for _, x, y in peaks:
+            found = Templates.refine(areas, templates, level, x, y)
+            if best is None or found[2] > best[2]:
+                best = found
+        if (best[2] < peaks[0][0] - Templates.SLACK or
+           (threshold is not None and best[2] < threshold)):
+            Templates.fallbacks += 1
+            return Templates.full(areas[0], templates[0])
+        return best
@@ -0,0 +1,87 @@
+"""Delays after inputs, measured on this machine."""
+import json
+import numpy
+import os
+import usersettings as userset
+
+
+class Timing():
+    """Delays per kind of input, calibrated to how fast the game reacts.
+
+    Without a profile the sleeps from usersettings are used. A profile is
+    made by Navigation.calibrate_timing(), which measures how long the game
+    takes to visibly react to each kind of input. The delay is the 95th
+    percentile of that times MARGIN, but never more than the setting it
+    replaces. When a check finds that an input didn't arrive, failed()
+    makes its delay longer again.
+    """
+
+    PATH = "timing.json"
+    # Safety factor over the measured reaction time
+    MARGIN = 1.5
+    # Shortest delay ever used, in seconds
+    MINIMUM = 0.005
+    # Factor a delay grows by when an input didn't arrive
+    BACKOFF = 1.5
+    DEFAULTS = {"click": userset.MEDIUM_SLEEP,
+                "fast_click": userset.FAST_SLEEP,
+                "key": userset.SHORT_SLEEP,
+                "menu": userset.LONG_SLEEP,
+                "submenu": userset.SHORT_SLEEP}
+    delays = None
+
+    @staticmethod
+    def delay(action):
+        """Return the delay in seconds after an input of this kind."""
+        if Timing.delays is None:
+            Timing.load()
+        return Timing.delays[action]
+
+    @staticmethod
+    def load():
+        """Load the profile, or use the defaults if there is none."""
+        Timing.delays = dict(Timing.DEFAULTS)
+        if os.path.exists(Timing.PATH):
+            with open(Timing.PATH) as f:
+                Timing.delays.update(json.load(f)["delays"])
+
+    @staticmethod
+    def save(samples=None):
+        """Save the current delays, and the samples they came from."""
+        profile = {"delays": Timing.delays}
+        if os.path.exists(Timing.PATH):
+            with open(Timing.PATH) as f:
+                profile["samples"] = json.load(f).get("samples", {})
+        if samples is not None:
+            profile["samples"] = samples
+        with open(Timing.PATH, "w") as f:
+            json.dump(profile, f, indent=1)
+
+    @staticmethod
+    def derive(samples):
+        """Set and save the delays from reaction times in seconds.
+
+        Keyword arguments:
+        samples -- dictionary of action: list of reaction times.
+        """
+        if Timing.delays is None:
+            Timing.load()
+        for action, times in samples.items():
+            if not times:
+                continue
+            measured = numpy.percentile(times, 95) * Timing.MARGIN
+            Timing.delays[action] = float(min(max(measured, Timing.MINIMUM),
+                                              Timing.DEFAULTS[action]))
+        Timing.save(samples)
+
+    @staticmethod
+    def failed(action):
+        """Make the delay of an input that didn't arrive longer."""
+        delay = Timing.delay(action)
+        if delay >= Timing.DEFAULTS[action]:
+            return
+        Timing.delays[action] = min(delay * Timing.BACKOFF,
+                                    Timing.DEFAULTS[action])
+        print(f"Input too fast for the game, {action} delay is now "
+              f"{Timing.delays[action] * 1000:.0f} ms")
+        Timing.save()
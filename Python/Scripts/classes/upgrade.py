@@ -1,8 +1,6 @@
 """Buys things for exp."""
 from classes.stats import Stats, Tracker
 import ngucon as ncon
-import usersettings as userset
-import time
 
 
 class Upgrade(Stats):
@@ -52,6 +50,9 @@ class Upgrade(Stats):
         self.exp()
 
         current_exp = self.ocr_value("XP")
+        if Stats.OCR_failures:
+            print("Couldn't read the current exp, not spending exp.")
+            return
 
         e_cost = ncon.EPOWER_COST + ncon.ECAP_COST * self.ecap + (
                  ncon.EBAR_COST * self.ebar)
@@ -79,16 +80,13 @@ class Upgrade(Stats):
         self.exp()
 
         self.click(ncon.EMPOWBOXX, ncon.EMBOXY)
-        self.send_string(str(e_power))
-        time.sleep(userset.MEDIUM_SLEEP)
+        self.send_number(e_power, ncon.EM_INPUT_SCIENTIFIC)
 
         self.click(ncon.EMCAPBOXX, ncon.EMBOXY)
-        self.send_string(str(e_cap))
-        time.sleep(userset.MEDIUM_SLEEP)
+        self.send_number(e_cap, ncon.EM_INPUT_SCIENTIFIC)
 
         self.click(ncon.EMBARBOXX, ncon.EMBOXY)
-        self.send_string(str(e_bars))
-        time.sleep(userset.MEDIUM_SLEEP)
+        self.send_number(e_bars, ncon.EM_INPUT_SCIENTIFIC)
 
         self.click(ncon.EMPOWBUYX, ncon.EMBUYY)
         self.click(ncon.EMCAPBUYX, ncon.EMBUYY)
@@ -97,16 +95,13 @@ class Upgrade(Stats):
         self.exp_magic()
 
         self.click(ncon.EMPOWBOXX, ncon.EMBOXY)
-        self.send_string(str(m_power))
-        time.sleep(userset.MEDIUM_SLEEP)
+        self.send_number(m_power, ncon.EM_INPUT_SCIENTIFIC)
 
         self.click(ncon.EMCAPBOXX, ncon.EMBOXY)
-        self.send_string(str(m_cap))
-        time.sleep(userset.MEDIUM_SLEEP)
+        self.send_number(m_cap, ncon.EM_INPUT_SCIENTIFIC)
 
         self.click(ncon.EMBARBOXX, ncon.EMBOXY)
-        self.send_string(str(m_bars))
-        time.sleep(userset.MEDIUM_SLEEP)
+        self.send_number(m_bars, ncon.EM_INPUT_SCIENTIFIC)
 
         self.click(ncon.EMPOWBUYX, ncon.EMBUYY)
         self.click(ncon.EMCAPBUYX, ncon.EMBUYY)
@@ -9,12 +9,17 @@ from classes.challenge import Challenge
 from classes.features import Features
 from classes.inputs import Inputs
 from classes.navigation import Navigation
+from classes.numberreader import NumberReader
+from classes.screens import Screens
 from classes.stats import Stats, EstimateRate, Tracker
+from classes.timing import Timing
 from classes.upgrade import Upgrade
 from classes.window import Window
 
 import ngucon as ncon
+import os
 import time
+import usersettings as userset
 
 
 def speedrun(duration, f):
@@ -44,59 +49,89 @@ def speedrun(duration, f):
 
     while time.time() < end - 20:
         f.wandoos(True)
+        energy = magic = None
+        if time.time () > start + 70:
+            # Read idle energy and magic while the diggers are clicked, they
+            # don't change either
+            energy = f.ocr_region_async("energy")
+            magic = f.ocr_region_async("magic")
         f.gold_diggers([2, 5, 6, 8, 11])
         if time.time() > start + 60 and not blood_digger_active:
             blood_digger_active = True
             f.gold_diggers([11], True)
-        if time.time () > start + 70:
-            try:
-                NGU_energy = int(f.remove_letters(f.ocr(ncon.OCR_ENERGY_X1, ncon.OCR_ENERGY_Y1, ncon.OCR_ENERGY_X2, ncon.OCR_ENERGY_Y2)))
-                feature.assign_ngu(NGU_energy, [1, 2, 4, 5, 6, 7, 8, 9])
-                NGU_magic = int(f.remove_letters(f.ocr(ncon.OCR_MAGIC_X1, ncon.OCR_MAGIC_Y1, ncon.OCR_MAGIC_X2, ncon.OCR_MAGIC_Y2)))
-                feature.assign_ngu(NGU_magic, [2], magic=True)
-            except ValueError:
-                print("couldn't assign e/m to NGUs")
+        if energy:
+            # Idle energy and magic switch to notation like 1.23E+15
+            NGU_energy, e_confidence = NumberReader.parse(energy.result())
+            NGU_magic, m_confidence = NumberReader.parse(magic.result())
+            if e_confidence >= NumberReader.THRESHOLD:
+                feature.assign_ngu(int(NGU_energy), [1, 2, 4, 5, 6, 7, 8, 9])
+            else:
+                print("couldn't assign energy to NGUs")
+            if m_confidence >= NumberReader.THRESHOLD:
+                feature.assign_ngu(int(NGU_magic), [2], magic=True)
+            else:
+                print("couldn't assign magic to NGUs")
             time.sleep(0.5)
     f.gold_diggers([2, 3, 5, 6, 12], True)
     f.nuke()
     time.sleep(2)
     f.fight()
-    f.pit()
+    status = f.status()  # The pit and the save button in one probe
+    f.pit(status)
     f.spin()
-    f.save_check()
+    f.save_check(status)
     tracker.progress()
     u.em()
     tracker.adjustxp()
     f.speedrun_bloodpill()
+    print(f"Waiting for the game instead of sleeping saved "
+          f"{Inputs.wait_saved:.1f}s this rebirth, {Inputs.wait_timeouts} "
+          f"waits timed out")
+    modifiers = f.get_modifiers()
+    if modifiers.blocks:
+        print(f"Held modifier keys blocked inputs {modifiers.blocks} times "
+              f"for {modifiers.blocked_time:.1f}s")
+    modifiers.reset_stats()
+    f.reset_wait_stats()
     while time.time() < end:
         time.sleep(0.1)
 
     return
 
 
-w = Window()
-i = Inputs()
-nav = Navigation()
-feature = Features()
-c = Challenge()
-Window.x, Window.y = i.pixel_search(ncon.TOP_LEFT_COLOR, 0, 0, 400, 600)
-nav.menu("inventory")
-
-u = Upgrade(37500, 37500, 2, 2, 3)
-
-print(w.x, w.y)
-tracker = Tracker(3)
-#u.em()
-#print(c.check_challenge())
-
-
-#feature.bb_ngu(4e8, [1, 2, 3, 4, 5, 6, 7, 8, 9], 1.05)
-#feature.speedrun_bloodpill()
-while True:  # main loop
-    #feature.boost_equipment()
-    #feature.ygg()
-    #feature.snipe(0, 120, bosses=False)
-
-    #time.sleep(120)
-    #c.start_challenge(3)
-    speedrun(3, feature)
+# The OCR workers import this module, only the bot itself may run it
+if __name__ == "__main__":
+    w = Window()
+    i = Inputs()
+    nav = Navigation()
+    feature = Features()
+    c = Challenge()
+    Window.x, Window.y = i.pixel_search(ncon.TOP_LEFT_COLOR, 0, 0, 400, 600)
+    nav.menu("inventory")
+    if (getattr(userset, "CALIBRATE_TIMING", False) and
+       not os.path.exists(Timing.PATH)):
+        nav.calibrate_timing()  # Delete timing.json to measure again
+    if (getattr(userset, "LEARN_SCREENS", False) and
+       not os.path.exists(Screens.PATH)):
+        nav.calibrate_screens()  # Delete screens.json to learn them again
+
+    u = Upgrade(37500, 37500, 2, 2, 3)
+
+    print(w.x, w.y)
+    tracker = Tracker(3)
+    i.start_ocr_pool()
+    i.start_input_queue()
+    #u.em()
+    #print(c.check_challenge())
+
+
+    #feature.bb_ngu(4e8, [1, 2, 3, 4, 5, 6, 7, 8, 9], 1.05)
+    #feature.speedrun_bloodpill()
+    while True:  # main loop
+        #feature.boost_equipment()
+        #feature.ygg()
+        #feature.snipe(0, 120, bosses=False)
+
+        #time.sleep(120)
+        #c.start_challenge(3)
+        speedrun(3, feature)
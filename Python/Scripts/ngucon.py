@@ -1,6 +1,12 @@
+"""Coordinates and colors of the game.
+
+Colors are compiled into Color integers when this module is imported.
+"""
+from classes.color import Color, Palette
+
 #TOP LEFT COLOR
 
-TOP_LEFT_COLOR = "000408"
+TOP_LEFT_COLOR = Color("000408")
 
 #ADVENTURE OFFSETS
 RIGHTARROWX = 930
@@ -28,11 +34,11 @@ IDLE_BUTTONX = 330
 IDLE_BUTTONY = 105
 ITOPOD_ACTIVEX = 594
 ITOPOD_ACTIVEY = 277
-ITOPOD_ACTIVE_COLOR = "000000"
-IDLECOLOR = "7C4E4E"
-NOTDEAD = "EB0000"
-ISBOSS = "F7EF29"
-DEAD = "EBEBEB"
+ITOPOD_ACTIVE_COLOR = Color("000000")
+IDLECOLOR = Color("7C4E4E")
+NOTDEAD = Color("EB0000")
+ISBOSS = Color("F7EF29")
+DEAD = Color("EBEBEB")
 
 TITAN_PT = {"GRB": {"p": 1.3e3, "t": 1.3e3}, "GCT": {"p": 5e3, "t": 4e3},
             "jake": {"p": 1.4e4, "t": 1.2e4}, "UUG": {"p": 4e5, "t": 3e5},
@@ -51,9 +57,9 @@ ABILITY_ROW1Y = 113
 ABILITY_ROW2Y = 150
 ABILITY_ROW3Y = 186
 
-ABILITY_ROW1_READY_COLOR = "F89B9B"
-ABILITY_ROW2_READY_COLOR = "6687A3"
-ABILITY_ROW3_READY_COLOR = "C39494"
+ABILITY_ROW1_READY_COLOR = Color("F89B9B")
+ABILITY_ROW2_READY_COLOR = Color("6687A3")
+ABILITY_ROW3_READY_COLOR = Color("C39494")
 
 ABILITY_PRIORITY = {1: 6,  # Strong
                     2: 8,  # Parry
@@ -66,7 +72,7 @@ ABILITY_PRIORITY = {1: 6,  # Strong
 
 PLAYER_HEAL_THRESHOLDX = 512
 PLAYER_HEAL_THRESHOLDY = 392
-PLAYER_HEAL_COLOR = "FFFFFF"
+PLAYER_HEAL_COLOR = Color("FFFFFF")
 
 OCR_ADV_POWX1 = 370
 OCR_ADV_POWY1 = 296
@@ -113,13 +119,31 @@ WANADOOSMENUOFFSETY = 315
 NGUMENUOFFSETY = 345
 YGGDRASILMENUOFFSETY = 375
 BEARDMENUOFFSETY = 405
+# Area that changes completely when a menu is opened
+CONTENTX1 = 310
+CONTENTY1 = 90
+CONTENTX2 = 950
+CONTENTY2 = 580
+
 NUMBERINPUTBOXX = 375
 NUMBERINPUTBOXY = 65
+# The input box accepts scientific notation like 6e8
+INPUT_SCIENTIFIC = True
+# The boxes of the exp menu only take plain numbers
+EM_INPUT_SCIENTIFIC = False
+# Read the input box back after typing and retype wrong numbers, this costs
+# an OCR read per number
+INPUT_VERIFY = False
+
+OCR_INPUT_BOXX1 = 330
+OCR_INPUT_BOXY1 = 55
+OCR_INPUT_BOXX2 = 520
+OCR_INPUT_BOXY2 = 76
 EXPX = 90
 EXPY = 450
 SAVEX = 23
 SAVEY = 483
-SAVE_READY_COLOR = "99FF99"
+SAVE_READY_COLOR = Color("99FF99")
 #FIGHT BOSS OFFSETS
 
 NUKEX = 620
@@ -148,10 +172,10 @@ TMMULTX = 532
 TMMULTY = 330
 TMLOCKEDX = 188
 TMLOCKEDY = 257
-TMLOCKEDCOLOR = "97A8B5"
+TMLOCKEDCOLOR = Color("97A8B5")
 #BLOOD MAGIC OFFSETS
-BMLOCKEDCOLOR = "97A8B5"
-BM_PILL_READY = "BA13A7"
+BMLOCKEDCOLOR = Color("97A8B5")
+BM_PILL_READY = Color("BA13A7")
 BMLOCKEDX = 229
 BMLOCKEDY = 294
 BMX = 570
@@ -180,7 +204,8 @@ AUGMENTSCROLLTOPY = 264
 SANITY_AUG_SCROLLX = 943
 SANITY_AUG_SCROLLY_TOP = 261
 SANITY_AUG_SCROLLY_BOT = 578
-SANITY_AUG_SCROLL_COLORS = ["497C9F", "4C81A5", "4C80A4", "497B9E"]
+SANITY_AUG_SCROLL_COLORS = Palette(["497C9F", "4C81A5", "4C80A4",
+                                    "497B9E"])
 
 #NGU OFFSETS
 
@@ -197,8 +222,8 @@ NGU_BAR_MINX = 306
 NGU_BAR_MAXX = 503
 NGU_BAR_Y = 215
 NGU_BAR_OFFSETY = 35
-NGU_BAR_WHITE = "FFFFFF"
-NGU_BAR_GRAY = "FAFAFA"
+NGU_BAR_WHITE = Color("FFFFFF")
+NGU_BAR_GRAY = Color("FAFAFA")
 
 #ADVTRAINING 
 
@@ -233,12 +258,12 @@ CHALLENGEY = 152
 CHALLENGEOFFSET = 30
 CHALLENGEACTIVEX = 391
 CHALLENGEACTIVEY = 111
-CHALLENGEACTIVECOLOR = "000000"
+CHALLENGEACTIVECOLOR = Color("000000")
 #PIT OFFSETS
 PITCOLORX = 195
 PITCOLORY = 108
-PITREADY = "7FD23B"
-PITSPIN = "FFD23B"
+PITREADY = Color("7FD23B")
+PITSPIN = Color("FFD23B")
 PITX = 630
 PITY = 290
 PITCONFIRMX = 437
@@ -330,6 +355,34 @@ OCR_CHALLENGE_24HC_TARGETY1 = 267
 OCR_CHALLENGE_24HC_TARGETX2 = 771
 OCR_CHALLENGE_24HC_TARGETY2 = 297
 
+#OCR REGIONS AND THEIR PROFILES, SEE Inputs.ocr_region()
+
+OCR_REGIONS = {
+    "boss": (OCRBOSSX1, OCRBOSSY1, OCRBOSSX2, OCRBOSSY2, "digits"),
+    "pp": (PPX1, PPY1, PPX2, PPY2, "text"),
+    "xp": (EXPX1, EXPY1, EXPX2, EXPY2, "text"),
+    "total_xp": (OCR_EXPX1, OCR_EXPY1, OCR_EXPX2, OCR_EXPY2, "scientific"),
+    "energy": (OCR_ENERGY_X1, OCR_ENERGY_Y1, OCR_ENERGY_X2, OCR_ENERGY_Y2,
+               "scientific"),
+    "magic": (OCR_MAGIC_X1, OCR_MAGIC_Y1, OCR_MAGIC_X2, OCR_MAGIC_Y2,
+              "scientific"),
+    "power": (OCR_ADV_POWX1, OCR_ADV_POWY1, OCR_ADV_POWX2, OCR_ADV_POWY2,
+              "scientific"),
+    "tough": (OCR_ADV_TOUGHX1, OCR_ADV_TOUGHY1, OCR_ADV_TOUGHX2,
+              OCR_ADV_TOUGHY2, "scientific"),
+    "titan": (OCR_ADV_TITANX1, OCR_ADV_TITANY1, OCR_ADV_TITANX2,
+              OCR_ADV_TITANY2, "text"),
+    "challenge_name": (OCR_CHALLENGE_NAMEX1, OCR_CHALLENGE_NAMEY1,
+                       OCR_CHALLENGE_NAMEX2, OCR_CHALLENGE_NAMEY2, "text"),
+    "24hc_target": (OCR_CHALLENGE_24HC_TARGETX1, OCR_CHALLENGE_24HC_TARGETY1,
+                    OCR_CHALLENGE_24HC_TARGETX2, OCR_CHALLENGE_24HC_TARGETY2,
+                    "text"),
+    "input_box": (OCR_INPUT_BOXX1, OCR_INPUT_BOXY1, OCR_INPUT_BOXX2,
+                  OCR_INPUT_BOXY2, "scientific"),
+}
+# Profile of the NGU levels, the rows are OCR_NGU_E_* + 35px per NGU
+OCR_NGU_PROFILE = "scientific"
+
 #BEARD OFFSETS
 
 BEARD_X = {1: 312, 2: 338, 3: 312, 4: 1}
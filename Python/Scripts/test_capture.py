@@ -0,0 +1,147 @@
+"""Checks of the capture, frame cache and glyph reading on synthetic frames.
+
+Run with python -m pytest from this folder. No game window is needed, the
+frames come from a FakeCapture.
+"""
+import ctypes
+import importlib
+import pytest
+import sys
+import time
+import types
+
+numpy = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from classes.capture import FakeCapture  # noqa: E402
+from classes.grabber import Grabber  # noqa: E402
+
+
+def solid_frames(count, width=64, height=48):
+    """Return RGB frames filled with 0, 40, 80, ... so they can be told apart.
+    """
+    return [numpy.full((height, width, 3), i * 40, dtype=numpy.uint8)
+            for i in range(count)]
+
+
+def test_fake_capture_cycles_frames_in_order():
+    capture = FakeCapture(solid_frames(3))
+    values = [int(capture.grab().rgb[0, 0, 0]) for _ in range(4)]
+    assert values == [0, 40, 80, 0]
+    assert capture.allocations == 1
+    assert capture.grabs == 4
+
+
+def test_fake_capture_region_matches_frame():
+    frame = numpy.arange(48 * 64 * 3, dtype=numpy.uint32).reshape(48, 64, 3)
+    frame = (frame % 251).astype(numpy.uint8)
+    capture = FakeCapture([frame])
+    area = capture.grab_region(5, 7, 20, 30)
+    assert numpy.array_equal(area, frame[7:30, 5:20])
+
+
+def test_grabber_frames_are_ordered_and_fresh():
+    count = 5
+    grabber = Grabber(FakeCapture(solid_frames(count)), rate=50)
+    grabber.start()
+    try:
+        frame, seq = grabber.wait(0, 1)
+        assert frame is not None and seq > 0
+        last_time = 0
+        for _ in range(5):
+            frame, seq = grabber.wait(seq, 1)
+            # The frame of capture number seq shows recorded frame seq - 1
+            assert int(frame.rgb[0, 0, 0]) == (seq - 1) % count * 40
+            assert frame.timestamp > last_time
+            last_time = frame.timestamp
+        latest, latest_seq = grabber.latest()
+        assert latest_seq >= seq
+    finally:
+        grabber.stop()
+    assert not grabber.is_alive()
+
+
+def test_grabber_wait_returns_on_timeout():
+    grabber = Grabber(FakeCapture(solid_frames(1)), rate=50)
+    frame, seq = grabber.wait(0, 0.01)  # Not started, nothing arrives
+    assert frame is None and seq == 0
+
+
+def stub_windows(monkeypatch):
+    """Stand in for the Windows modules and settings where they are missing.
+
+    The pywin32 stand-ins return 0 for every name. The GDI capture and the
+    keyboard hook load Windows DLLs on import, so they are replaced by
+    empty classes off Windows.
+    """
+    for name in ("win32api", "win32con", "win32gui", "win32ui"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            module = types.ModuleType(name)
+            module.__getattr__ = lambda attribute: 0
+            monkeypatch.setitem(sys.modules, name, module)
+    if not hasattr(ctypes, "WinDLL"):
+        for name, cls in (("classes.gdicapture", "GdiCapture"),
+                          ("classes.modifiers", "Modifiers")):
+            module = types.ModuleType(name)
+            setattr(module, cls, type(cls, (), {}))
+            monkeypatch.setitem(sys.modules, name, module)
+    try:
+        importlib.import_module("usersettings")
+    except ImportError:
+        monkeypatch.setitem(sys.modules, "usersettings",
+                            importlib.import_module("usersettings_example"))
+
+
+def test_frame_cache_is_invalidated_by_inputs(monkeypatch):
+    stub_windows(monkeypatch)
+    from classes.inputs import Inputs
+    from classes.window import Window
+
+    inputs = Inputs()
+    saved = (Inputs.capture, Inputs.frame, Inputs.FRAME_TTL,
+             Window.x, Window.y)
+    Inputs.capture = FakeCapture(solid_frames(2))
+    Inputs.frame = None
+    Inputs.FRAME_TTL = 60
+    Window.x = Window.y = 0
+    try:
+        first = inputs.get_frame()
+        assert inputs.get_frame() is first  # Served from the cache
+        hits = Inputs.frame_hits
+        inputs.invalidate_frame()
+        second = inputs.get_frame()
+        assert Inputs.frame_hits == hits
+        assert int(second.rgb[0, 0, 0]) == 40
+        # A frame captured before the last input is never served
+        Inputs.input_time = time.perf_counter() + 1
+        assert inputs.cached_frame() is None
+    finally:
+        (Inputs.capture, Inputs.frame, Inputs.FRAME_TTL,
+         Window.x, Window.y) = saved
+        Inputs.input_time = 0
+
+
+def render(text):
+    """Return a crop showing text in white on black, one glyph at a time."""
+    cv2 = pytest.importorskip("cv2")
+    glyphs = []
+    for c in text:
+        glyph = numpy.zeros((20, 14, 3), dtype=numpy.uint8)
+        cv2.putText(glyph, c, (1, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                    (255, 255, 255), 1)
+        glyphs.append(glyph)
+    return numpy.concatenate(glyphs, axis=1)
+
+
+def test_digits_reads_learned_font(tmp_path):
+    pytest.importorskip("cv2")
+    from classes.digits import Digits
+
+    reader = Digits(str(tmp_path / "glyphs.npz"))
+    assert reader.read(render("42")) == ("", 0)
+    assert reader.learn(render("0123456789"), "0123456789")
+    text, confidence = reader.read(render("40965"))
+    assert text == "40965"
+    assert confidence >= Digits.THRESHOLD
@@ -1,11 +1,29 @@
 # user defined settings
 
 # SLEEPS
+
+# The longest delays after inputs.
 FAST_SLEEP = 0.035
 SHORT_SLEEP = 0.1
 MEDIUM_SLEEP = 0.2
 LONG_SLEEP = 0.3
 
+# Measure how fast the game reacts on start and use shorter delays if it can.
+# This types into the augmentations input box and switches menus. The result
+# is saved to timing.json, delete it to measure again.
+CALIBRATE_TIMING = False
+
+# Learn how every menu looks on start, so navigation can check where it is.
+# This opens every menu once. The result is saved to screens.json, delete it
+# to learn again.
+LEARN_SCREENS = False
+
+# SCREEN CAPTURE
+
+# How long (in seconds) a capture of the window is reused before taking a new
+# one. Any click or keystroke discards the capture immediately.
+FRAME_TTL = 0.005
+
 # How long to farm blood for iron pill (in seconds)
 
 PILL = 300
@@ -39,6 +39,7 @@ IGNORE THIS IF YOU DON'T USE FIREFOX FOR YOUR NORMAL BROWSING
 
 import cv2
 import numpy
+import os
 import pytesseract
 import re
 import time
@@ -153,13 +154,14 @@ def pixel_search(color, x_start, y_start, x_end, y_end):
 
     Color must be supplied in hex.
     """
-    bmp = get_bitmap()
-    for y in range(y_start, y_end):
-        for x in range(x_start, x_end):
-            t = bmp.getpixel((x, y))
-            if (rgb_to_hex(t) == color):
-                return x - 8, y - 8
-    return None
+    area = numpy.asarray(get_bitmap())[y_start:y_end, x_start:x_end]
+    area = area.astype(numpy.uint32)
+    packed = area[..., 0] << 16 | area[..., 1] << 8 | area[..., 2]
+    match = numpy.flatnonzero(packed == int(color, 16))
+    if not match.size:
+        return None
+    y, x = divmod(int(match[0]), packed.shape[1])
+    return x + x_start - 8, y + y_start - 8
 
 
 def get_pixel_color(x, y):
@@ -203,11 +205,33 @@ def image_search(x_start, y_start, x_end, y_end, image):
     # Bitmaps are created with a 8px border
     search_area = bmp.crop((x_start + 8, y_start + 8, x_end + 8, y_end + 8))
     search_area = numpy.asarray(search_area)
-    search_area = cv2.cvtColor(search_area, cv2.COLOR_BGR2GRAY)
-    template = cv2.imread(image, 0)
-    res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF)
-    *_, t = cv2.minMaxLoc(res)
-    return t
+    search_area = cv2.cvtColor(search_area, cv2.COLOR_RGB2GRAY)
+    template = get_template(image)
+    height, width = template.shape
+    if min(height, width) >= 16:
+        # Find the match on half size images, then refine it at full size
+        res = cv2.matchTemplate(cv2.pyrDown(search_area),
+                                cv2.pyrDown(template), cv2.TM_CCOEFF_NORMED)
+        _, coarse, _, (x, y) = cv2.minMaxLoc(res)
+        x0, y0 = max(2 * x - 3, 0), max(2 * y - 3, 0)
+        res = cv2.matchTemplate(search_area[y0:2 * y + height + 3,
+                                            x0:2 * x + width + 3],
+                                template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(res)
+        # A worse score at full size means the coarse match was wrong
+        if score >= coarse - 0.02:
+            return x + x0, y + y0
+    res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
+    *_, (x, y) = cv2.minMaxLoc(res)
+    return x, y
+
+
+def get_template(path):
+    """Load a grayscale template once, reload it if the file changes."""
+    mtime = os.path.getmtime(path)
+    if path not in templates or templates[path][0] != mtime:
+        templates[path] = (mtime, cv2.imread(path, 0))
+    return templates[path][1]
 
 
 def remove_letters(s):
@@ -216,6 +240,7 @@ def remove_letters(s):
 
 
 top_windows = []
+templates = {}
 hwnd = get_hwnd()
 NGU_OFFSET_X, NGU_OFFSET_Y = pixel_search("212429", 0, 0, 1920, 1080)
 pit_color = get_pixel_color(195, 108)